@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+
+'''
+' @file   Boxes.py
+' @desc   Per-post summaries of sub-image bounding boxes, kept in PostBoxes by syncGraph.py ...
+'         ... so post views read them by primary key instead of scanning PostRelatedness.
+' @notes  boxes         distinct sub_img_meta of the post's edges as post1 (served by /posts/<pid>)
+'         linked_boxes  {coords, other_post_id} of every boxed edge touching the post ...
+'                       ... (served by /posts/trending?getBoxes=true)
+'         All functions expect a dictionary cursor.
+'''
+
+### Imports
+
+import json
+
+
+### Constants
+
+CHUNK_SIZE = 1000
+
+
+### Functions
+
+def chunks(ids):
+    ids = list(ids)
+    for i in range(0, len(ids), CHUNK_SIZE):
+        yield ids[i:i + CHUNK_SIZE]
+
+
+def postIds(cursor, scrape_ids):
+    '''
+    @desc    Maps scrape_id's to our post id's
+    @return  set of post id's
+    '''
+    ids = set()
+    for chunk in chunks(scrape_ids):
+        sql = f'''
+        SELECT id FROM mews_app.Posts WHERE scrape_id IN ({','.join(['%s'] * len(chunk))})
+        ;
+        '''
+        cursor.execute(sql, chunk)
+        ids.update(row['id'] for row in cursor.fetchall())
+    return ids
+
+
+def boxedPostIds(cursor):
+    '''
+    @desc    Returns the id of every post with a boxed edge, for a full rebuild
+    '''
+    sql = '''
+    SELECT post1_id AS id FROM mews_app.PostRelatedness WHERE sub_img_meta IS NOT NULL
+    UNION
+    SELECT post2_id AS id FROM mews_app.PostRelatedness WHERE sub_img_meta IS NOT NULL
+    ;
+    '''
+    cursor.execute(sql)
+    return {row['id'] for row in cursor.fetchall()}
+
+
+def refreshBoxes(cursor, post_ids):
+    '''
+    @desc    Recomputes the PostBoxes rows of the given posts from PostRelatedness
+    --
+    @param   cursor    cursor for mysql.connector
+    @param   post_ids  iterable of post id's whose edges changed
+    @return  number of rows written
+    '''
+    written = 0
+    for chunk in chunks(post_ids):
+        wanted = set(chunk)
+        boxes = {pid: [] for pid in chunk}
+        linked = {pid: [] for pid in chunk}
+
+        # Boxed Edges on Either Side, Each Edge Once
+        placeholders = ','.join(['%s'] * len(chunk))
+        sql = f'''
+        SELECT post1_id, post2_id, sub_img_meta
+        FROM mews_app.PostRelatedness
+        WHERE post1_id IN ({placeholders}) AND sub_img_meta IS NOT NULL
+        UNION
+        SELECT post1_id, post2_id, sub_img_meta
+        FROM mews_app.PostRelatedness
+        WHERE post2_id IN ({placeholders}) AND sub_img_meta IS NOT NULL
+        ;
+        '''
+        cursor.execute(sql, chunk + chunk)
+        for row in cursor.fetchall():
+            source, target, coords = row['post1_id'], row['post2_id'], row['sub_img_meta']
+            if source in wanted:
+                if coords not in boxes[source]:
+                    boxes[source].append(coords)
+                linked[source].append({'coords': coords, 'other_post_id': target})
+            if target in wanted:
+                linked[target].append({'coords': coords, 'other_post_id': source})
+
+        # Posts Without Boxes Get Empty Lists, Clearing Stale Rows
+        sql = '''
+        REPLACE INTO mews_app.PostBoxes (post_id, boxes, linked_boxes)
+        VALUES (%s, %s, %s)
+        ;
+        '''
+        cursor.executemany(sql, [(pid, json.dumps(boxes[pid]), json.dumps(linked[pid])) for pid in chunk])
+        written += len(chunk)
+
+    return written
+
+
+def loadBoxes(cursor, post_ids):
+    '''
+    @desc    Reads the box summaries of the given posts
+    @return  dict of post id to {'boxes': [...], 'linked_boxes': [...]}; posts without a row get empty lists
+    '''
+    out = {pid: {'boxes': [], 'linked_boxes': []} for pid in post_ids}
+    for chunk in chunks(out):
+        sql = f'''
+        SELECT post_id, boxes, linked_boxes
+        FROM mews_app.PostBoxes
+        WHERE post_id IN ({','.join(['%s'] * len(chunk))})
+        ;
+        '''
+        cursor.execute(sql, chunk)
+        for row in cursor.fetchall():
+            out[row['post_id']] = {'boxes': json.loads(row['boxes']), 'linked_boxes': json.loads(row['linked_boxes'])}
+    return out
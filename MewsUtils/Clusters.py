@@ -5,21 +5,55 @@
 
 import json
 import os
+import zlib
+import threading
 import mysql.connector
 from flask import jsonify
-from . import Connection, Images
+from . import Connection, DataVersion, Images, Streaming
+
+### Constants
+
+MAX_CACHED_DAYS = 1024
+
+### Globals
+
+LOCK = threading.Lock()
+DAILY_CLUSTERINGS = {}  # day -> (data version, clustering id)
 
 ### Functions
 
-def getDailyClusters(day, amount):
-     # Connect to DB
-    try:
-        cnx = mysql.connector.connect(**Connection.DB_CONFIG)
-    except mysql.connector.Error as err:
-        return {'error': 'Could not connect to DB'}, 400
-    cursor = cnx.cursor(dictionary=True)
+def payloadItems(payload, amount):
+    '''
+    @desc    Streams the /clusters response from a payload stored by clusterPosts.py
+    --
+    @param   payload  compressed JSON of size-ranked clusters
+    @param   amount   number of clusters to return
+    @return  generator of ('node' | 'link', data) items
+    '''
+    clusters = json.loads(zlib.decompress(payload))['clusters']
+    if amount is not None and len(clusters) > amount:
+        clusters = clusters[:amount]
+
+    for cluster in clusters:
+        for node in cluster['nodes']:
+            node['svg'] = Images.getImageURL(node['id'])
+            yield 'node', node
+    for cluster in clusters:
+        for source, target, weight in cluster['links']:
+            yield 'link', {'source': source, 'target': target, 'weight': weight}
+        yield 'link', {'source': cluster['representative'], 'target': cluster['representative']}
+
+def clusteringOfDay(cursor, day):
+    '''
+    @desc    Returns the clustering id of a day (None if there is none), cached until the data version changes
+    '''
+    version = DataVersion.current(cursor)
+    with LOCK:
+        cached = DAILY_CLUSTERINGS.get(day)
+    if cached is not None and version is not None and cached[0] == version:
+        return cached[1]
 
-    # Query ID of Relevant Clustering
+    # Query Relevant Clustering
     sql = '''
         SELECT
             clustering_id
@@ -35,38 +69,73 @@ def getDailyClusters(day, amount):
     cursor.execute(sql, args)
 
     result = cursor.fetchone()
+    cid = result['clustering_id'] if result is not None else None
 
-    # Clean Up
-    cursor.close()
-    cnx.close()
+    # Misses Are Cached Too; clusterPosts.py Bumps the Version When It Adds a Day
+    if version is not None:
+        with LOCK:
+            if len(DAILY_CLUSTERINGS) >= MAX_CACHED_DAYS:
+                DAILY_CLUSTERINGS.clear()
+            DAILY_CLUSTERINGS[day] = (version, cid)
 
-    # Determine Results
-    if result is None:
-        return {'error': 'No cluster information available'}, 400
-    else:
-        return getClusters(result['clustering_id'], amount), 200
+    return cid
 
-def getClusters(cid, amount):
+def iterDailyClusters(day, amount):
+    # Connect to DB, Once for the Whole Daily Path
+    try:
+        cnx = Connection.connect()
+    except mysql.connector.Error as err:
+        yield 'error', ({'error': 'Could not connect to DB'}, 400)
+        return
+    cursor = cnx.cursor(dictionary=True)
+
+    try:
+        cid = clusteringOfDay(cursor, day)
+        if cid is None:
+            yield 'error', ({'error': 'No cluster information available'}, 400)
+            return
+
+        yield from clusterItems(cursor, cid, amount)
+    finally:
+        # Clean Up
+        cursor.close()
+        cnx.close()
+
+def dailyClusters(day, amount):
+    return Streaming.collect(iterDailyClusters(day, amount))
+
+def iterClusters(cid, amount):
     # Connect to Mews-App DB
     try:
-        cnx = mysql.connector.connect(**Connection.DB_CONFIG)
+        cnx = Connection.connect()
     except mysql.connector.Error:
-        return jsonify({'error': 'Could not connect to DB'}), 400
+        yield 'error', ({'error': 'Could not connect to DB'}, 400)
+        return
     cursor = cnx.cursor(dictionary=True)
 
-    # Query Nodes
+    try:
+        yield from clusterItems(cursor, cid, amount)
+    finally:
+        # Clean Up
+        cursor.close()
+        cnx.close()
+
+def getClusters(cid, amount):
+    out, code = Streaming.collect(iterClusters(cid, amount))
+    if code != 200:
+        return jsonify(out), code
+
+    return jsonify(out)
+
+def clusterItems(cursor, cid, amount):
+    # Serve Stored Payload if Clustering Has One
     sql = '''
         SELECT
-            PostsInClusters.cluster_id as cluster_id,
-            PostsInClusters.post_id as post_id,
-            PostsInClusters.centrality as centrality
+            payload
         FROM
-            mews_app.Clusters,
-            mews_app.PostsInClusters
+            mews_app.ClusteringPayloads
         WHERE
-            Clusters.clustering_id = %(clustering_id)s
-            AND
-            PostsInClusters.cluster_id = Clusters.id
+            clustering_id = %(clustering_id)s
         ;
     '''
 
@@ -76,44 +145,53 @@ def getClusters(cid, amount):
 
     cursor.execute(sql, args)
 
-    # Format Clusters
-    clusters = {}
-    for row in cursor.fetchall():
-        clusters[row['cluster_id']] = clusters.get(row['cluster_id'], []) + [{'post_id': row['post_id'], 'centrality': row['centrality']}]
-    
-    # Limit (Sorted) Clusters
-    clusters = list(sorted(clusters.items(), key=lambda t: len(t[1]), reverse=True))
-    if amount is not None and len(clusters) > amount:
-        clusters = clusters[:amount]
-    clusters = dict(clusters)
+    result = cursor.fetchone()
+    if result is not None:
+        yield from payloadItems(result['payload'], amount)
+        return
 
-    # Query Post Information
+    # Query Nodes of Top Ranked Clusters
     sql = '''
-        SELECT 
-            post_url
+        SELECT
+            Clusters.id as cluster_id,
+            Clusters.representative_id as representative_id,
+            PostsInClusters.post_id as post_id,
+            PostsInClusters.centrality as centrality,
+            Posts.post_url as post_url
         FROM
+            mews_app.Clusters,
+            mews_app.PostsInClusters,
             mews_app.Posts
-        WHERE 
-            id = %(post_id)s
+        WHERE
+            Clusters.clustering_id = %(clustering_id)s
+            AND
+            (
+                %(all)s
+                OR
+                Clusters.size_rank < %(amount)s
+            )
+            AND
+            PostsInClusters.cluster_id = Clusters.id
+            AND
+            Posts.id = PostsInClusters.post_id
+        ORDER BY
+            Clusters.size_rank
         ;
     '''
 
-    # Get Information for Each Post, Add to Output
-    out = {'nodes':[], 'links':[]}
-    for cluster in clusters.values():
-        for post in cluster:
-            args = {
-                'post_id': post['post_id']
-            }
-
-            cursor.execute(sql, args)
+    args = {
+        'clustering_id': cid,
+        'all': amount is None,
+        'amount': amount if amount is not None else 0
+    }
 
-            result = cursor.fetchone()
-            result.update({'id': post['post_id'], 'centrality': post['centrality'], 'svg': Images.getImageURL(post["post_id"])})
-            out['nodes'].append(result)
+    cursor.execute(sql, args)
 
-    # Determine Central Post of Each Cluster
-    most_central_post = {cluster_id: max(cluster, key=lambda p: p['centrality']) for cluster_id, cluster in clusters.items()}
+    # Format Clusters, Emit Nodes as They Are Fetched
+    most_central_post = {}
+    for row in iter(cursor.fetchone, None):
+        most_central_post[row['cluster_id']] = row['representative_id']
+        yield 'node', {'post_url': row['post_url'], 'id': row['post_id'], 'centrality': row['centrality'], 'svg': Images.getImageURL(row['post_id'])}
 
     # Query Edges
     sql = '''
@@ -138,25 +216,21 @@ def getClusters(cid, amount):
             PostRelatedness.post2_id = PostsInClusters2.post_id
             AND
             PostRelatedness.total_wt > 0
+        ORDER BY
+            PostRelatedness.post1_id,
+            PostRelatedness.post2_id
         ;
     '''
 
     # Add Edges To Output
-    for cluster_id, cluster in clusters.items():
+    for cluster_id, representative_id in most_central_post.items():
         args = {
             'cluster_id': cluster_id
         }
 
         cursor.execute(sql, args)
 
-        for edge in cursor.fetchall():
-            out['links'].append({'source': edge['post1_id'], 'target': edge['post2_id'], 'weight': edge['weight']})
-
-        representative_id = most_central_post[cluster_id]['post_id']
-        out['links'].append({'source': representative_id, 'target': representative_id})
-
-    # Clean Up
-    cursor.close()
-    cnx.close()
+        for edge in iter(cursor.fetchone, None):
+            yield 'link', {'source': edge['post1_id'], 'target': edge['post2_id'], 'weight': edge['weight']}
 
-    return jsonify(out)
\ No newline at end of file
+        yield 'link', {'source': representative_id, 'target': representative_id}
\ No newline at end of file
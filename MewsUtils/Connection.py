@@ -1,6 +1,10 @@
 #!/usr/bin/env python3
 
 import json
+import time
+import os
+import mysql.connector
+from . import Metrics
 
 DB_CONFIG = {
   'user': 'mews_app_user',
@@ -11,6 +15,15 @@ DB_CONFIG = {
   'collation': 'utf8mb4_general_ci'
 }
 
+# Connections Reused per Process if > 0 (mysql.connector Allows up to 32); Size It to the Server's Threads
+POOL_SIZE = int(os.environ.get('MEWS_DB_POOL_SIZE', 0))
+if not 0 <= POOL_SIZE <= mysql.connector.pooling.CNX_POOL_MAXSIZE:
+    raise ValueError(f'MEWS_DB_POOL_SIZE must be between 0 and {mysql.connector.pooling.CNX_POOL_MAXSIZE}')
+
+# Seconds to Wait for a Pooled Connection to Be Returned Before Failing the Request
+POOL_TIMEOUT = float(os.environ.get('MEWS_DB_POOL_TIMEOUT', 10))
+POOL_RETRY_SECONDS = 0.05
+
 def loadConfig(filepath):
     """
     @desc    Grabs JSON from file
@@ -18,3 +31,23 @@ def loadConfig(filepath):
     """
     with open(filepath) as f:
         return json.load(f)
+
+def openPooled(**config):
+    # close() Hands the Connection Back to the Pool; an Exhausted Pool Raises at Once, so Retry Until POOL_TIMEOUT
+    deadline = time.monotonic() + POOL_TIMEOUT
+    while True:
+        try:
+            return mysql.connector.connect(pool_name='mews_app', pool_size=POOL_SIZE, **config)
+        except mysql.connector.errors.PoolError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(POOL_RETRY_SECONDS)
+
+def connect():
+    """
+    @desc    Opens a connection to mews_app (from the pool if MEWS_DB_POOL_SIZE is set), ...
+             ... instrumented for the current request
+    @return  connection
+    """
+    opener = openPooled if POOL_SIZE > 0 else mysql.connector.connect
+    return Metrics.connect(opener, **DB_CONFIG)
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+
+'''
+' @file   DataVersion.py
+' @desc   Global data version stamp for ETag/304 on the JSON routes.
+' @notes  syncPosts.py, updatePosts.py, syncGraph.py and clusterPosts.py call bump() before they ...
+'         ... commit, so the version changes whenever served data may have. The app reads the ...
+'         ... version at most once every MEWS_DATA_VERSION_TTL seconds (default 5) and answers a ...
+'         ... matching If-None-Match with 304 before the route touches the database.
+'         ETags also carry today's date (trending scores age by day) and a hash of the URL and ...
+'         ... Accept header, so different queries and NDJSON/JSON variants never share a tag.
+'         Windowed routes hash the resolved (bucketed) time window too, so a default window ...
+'         ... gets a new tag each time it moves to the next bucket.
+'         Routes the graph index can serve also carry the loaded index's build time: the app ...
+'         ... swaps in a new snapshot up to MEWS_GRAPH_INDEX_POLL seconds after the bump.
+'''
+
+### Imports
+
+from datetime import date
+from flask import g, request
+import threading
+import hashlib
+import time
+import os
+from . import Connection, GraphIndex
+
+
+### Constants
+
+TTL_SECONDS = float(os.environ.get('MEWS_DATA_VERSION_TTL', 5))
+
+# JSON Routes (endpoint names in app.py) Served With ETags
+ENDPOINTS = {
+    'getTrending', 'getPost', 'getPosts', 'getRelatedPosts', 'getCentralPosts',
+    'getCentralGraph', 'getClusters', 'getDailyClusters', 'getAutocomplete'
+}
+
+# Endpoints GraphIndex May Answer
+INDEX_ENDPOINTS = {'getRelatedPosts', 'getCentralPosts', 'getCentralGraph'}
+
+# Endpoints Whose Default Time Window Moves With the Clock
+WINDOW_ENDPOINTS = {'getTrending', 'getCentralPosts', 'getCentralGraph'}
+
+
+### Globals
+
+LOCK = threading.Lock()
+CACHED = {'version': None, 'read': 0.0}
+HOOKS = {'window': None}
+
+
+### Functions
+
+def bump(cursor):
+    '''
+    @desc   Increments the data version; call in the job's transaction, right before commit
+    '''
+    sql = '''
+    INSERT INTO mews_app.DataVersion (id, version, updated)
+    VALUES (1, 1, NOW())
+    ON DUPLICATE KEY UPDATE
+        version = version + 1,
+        updated = NOW()
+    ;
+    '''
+    cursor.execute(sql)
+
+
+def current(cursor=None):
+    '''
+    @desc    Returns the data version, re-read from the DB at most every TTL_SECONDS
+    --
+    @param   cursor  cursor to read with, if the caller already holds a connection
+    @return  version, or None if it cannot be read
+    '''
+    now = time.monotonic()
+    with LOCK:
+        if CACHED['version'] is not None and now - CACHED['read'] < TTL_SECONDS:
+            return CACHED['version']
+
+    sql = 'SELECT version FROM mews_app.DataVersion WHERE id = 1;'
+    try:
+        if cursor is not None:
+            cursor.execute(sql)
+            row = cursor.fetchone()
+        else:
+            cnx = Connection.connect()
+            try:
+                own_cursor = cnx.cursor()
+                own_cursor.execute(sql)
+                row = own_cursor.fetchone()
+            finally:
+                cnx.close()
+    except Exception:
+        return None
+
+    if row is None:
+        version = 0
+    else:
+        version = row['version'] if isinstance(row, dict) else row[0]
+    with LOCK:
+        CACHED['version'], CACHED['read'] = version, now
+    return version
+
+
+def etag(version):
+    window = HOOKS['window']() if HOOKS['window'] is not None and request.endpoint in WINDOW_ENDPOINTS else ()
+    variant = hashlib.sha1(f'{request.full_path}|{request.headers.get("Accept", "")}|{"|".join(window)}'.encode()).hexdigest()[:16]
+    index = GraphIndex.CURRENT
+    if index is not None and request.endpoint in INDEX_ENDPOINTS:
+        return f'v{version}-i{index.built.timestamp():.0f}-{date.today().isoformat()}-{variant}'
+    return f'v{version}-{date.today().isoformat()}-{variant}'
+
+
+def beforeRequest():
+    if request.method != 'GET' or request.endpoint not in ENDPOINTS:
+        return None
+    version = current()
+    if version is None:
+        return None
+
+    g.data_version_etag = etag(version)
+    if request.if_none_match.contains(g.data_version_etag):
+        return '', 304, {'ETag': f'"{g.data_version_etag}"'}
+    return None
+
+
+def afterRequest(response):
+    tag = g.pop('data_version_etag', None)
+    if tag is not None and response.status_code == 200:
+        response.set_etag(tag)
+    return response
+
+
+def register(app, window=None):
+    '''
+    @desc   Adds the ETag hooks to app
+    --
+    @param  app     Flask app
+    @param  window  function returning the current request's resolved (upper, lower)
+    '''
+    HOOKS['window'] = window
+    app.before_request(beforeRequest)
+    app.after_request(afterRequest)
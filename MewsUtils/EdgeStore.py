@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+
+'''
+' @file   EdgeStore.py
+' @desc   Day-partitioned binary copy of the post graph for clustering without the DB.
+' @notes  Each partition holds the edges whose newer post was posted that day, so a ...
+'         ... window [begin, end) needs the partitions in that range and keeps the ...
+'         ... edges whose older post (the `day` array) is not before begin.
+'         Arrays are native byte order; partitions are not portable across architectures.
+'''
+
+### Imports
+
+from contextlib import contextmanager
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+from array import array
+import struct
+import mmap
+import os
+
+
+### Constants
+
+STORE_FOLDER = '/data/mews/edge_store'
+
+# Partition File: header, then src (int64), dst (int64), weight (float64), day (int32) arrays
+MAGIC = b'MEWSEDG1'
+HEADER_FORMAT = '8sq'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+Partition = namedtuple('Partition', ['src', 'dst', 'weight', 'day'])
+
+
+### Functions
+
+def partitionPath(store_dir, day):
+    return os.path.join(store_dir, f'{day.isoformat()}.edges')
+
+
+def writePartition(store_dir, day, edges):
+    '''
+    @desc   Atomically replaces the partition of a day
+    --
+    @param  store_dir  directory of the store
+    @param  day        date of the partition
+    @param  edges      iterable of (src, dst, weight, older post's date) tuples
+    '''
+    src, dst, weight, days = array('q'), array('q'), array('d'), array('i')
+    for edge_src, edge_dst, edge_weight, edge_day in edges:
+        src.append(edge_src)
+        dst.append(edge_dst)
+        weight.append(edge_weight)
+        days.append(edge_day.toordinal())
+
+    os.makedirs(store_dir, exist_ok=True)
+    filepath = partitionPath(store_dir, day)
+    tmp_filepath = filepath + '.tmp'
+    with open(tmp_filepath, 'wb') as f:
+        f.write(struct.pack(HEADER_FORMAT, MAGIC, len(src)))
+        src.tofile(f)
+        dst.tofile(f)
+        weight.tofile(f)
+        days.tofile(f)
+    os.replace(tmp_filepath, filepath)
+
+
+@contextmanager
+def openPartition(store_dir, day):
+    '''
+    @desc    Memory-maps the partition of a day
+    --
+    @param   store_dir  directory of the store
+    @param   day        date of the partition
+    @return  Partition of memoryviews (day holds ordinals), or None if it was never exported
+    '''
+    try:
+        f = open(partitionPath(store_dir, day), 'rb')
+    except FileNotFoundError:
+        yield None
+        return
+
+    with f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mm)
+        magic, count = struct.unpack_from(HEADER_FORMAT, view)
+        if magic != MAGIC:
+            view.release()
+            mm.close()
+            raise ValueError(f'{f.name} is not an edge partition')
+
+        # Slice Arrays Out of the Mapping
+        views = []
+        offset = HEADER_SIZE
+        for typecode, size in (('q', 8), ('q', 8), ('d', 8), ('i', 4)):
+            views.append(view[offset:offset + count * size].cast(typecode))
+            offset += count * size
+
+        try:
+            yield Partition(*views)
+        finally:
+            for v in views:
+                v.release()
+            view.release()
+            mm.close()
+
+
+def days(begin_day, end_day):
+    # Dates in [begin_day, end_day)
+    for offset in range((end_day - begin_day).days):
+        yield begin_day + timedelta(offset)
+
+
+def changedDays(store_dir, begin_day, end_day, since):
+    '''
+    @desc    Dates in [begin_day, end_day) whose partition was (re)written at or after since
+    --
+    @param   since  seconds since the epoch, as from time.time()
+    '''
+    changed = []
+    for day in days(begin_day, end_day):
+        try:
+            if os.stat(partitionPath(store_dir, day)).st_mtime >= since:
+                changed.append(day)
+        except FileNotFoundError:
+            continue
+    return changed
+
+
+def loadEdges(store_dir, begin_day, end_day, min_day, max_day=None):
+    '''
+    @desc    Yields the edges of the partitions in [begin_day, end_day) whose older post ...
+             ... was posted in [min_day, max_day)
+    --
+    @param   store_dir  directory of the store
+    @param   begin_day  first partition to read
+    @param   end_day    partition after the last one to read
+    @param   min_day    earliest date of the older post
+    @param   max_day    date after the latest date of the older post (no bound if None)
+    @return  generator of (src, dst, weight) tuples
+    '''
+    min_ordinal = min_day.toordinal()
+    max_ordinal = max_day.toordinal() if max_day is not None else None
+    for day in days(begin_day, end_day):
+        with openPartition(store_dir, day) as partition:
+            if partition is None:
+                continue
+            for i in range(len(partition.src)):
+                if partition.day[i] < min_ordinal:
+                    continue
+                if max_ordinal is not None and partition.day[i] >= max_ordinal:
+                    continue
+                yield partition.src[i], partition.dst[i], partition.weight[i]
+
+
+def loadWindow(store_dir, begin_day, end_day):
+    '''
+    @desc    Yields the edges with both posts posted in [begin_day, end_day)
+    --
+    @param   store_dir  directory of the store
+    @param   begin_day  first date of the window
+    @param   end_day    date after the last date of the window
+    @return  generator of (src, dst, weight) tuples
+    '''
+    return loadEdges(store_dir, begin_day, end_day, begin_day)
+
+
+def exportDays(cursor, store_dir, begin_day, end_day):
+    '''
+    @desc    Rewrites the partitions in [begin_day, end_day) from mews_app
+    --
+    @param   cursor     cursor (dictionary=True) for mysql.connector
+    @param   store_dir  directory of the store
+    @param   begin_day  first date to export
+    @param   end_day    date after the last date to export
+    @return  number of edges written
+    '''
+
+    # Edges Whose Newer Post Falls in Range
+    sql = '''
+        SELECT
+            edge.post1_id as node1_id,
+            edge.post2_id as node2_id,
+            edge.total_wt as weight,
+            DATE(node1.when_posted) as day1,
+            DATE(node2.when_posted) as day2
+        FROM
+            mews_app.PostRelatedness as edge,
+            mews_app.Posts as node1,
+            mews_app.Posts as node2
+        WHERE
+            edge.post1_id = node1.id
+            AND
+            edge.post2_id = node2.id
+            AND
+            node1.when_posted < %(end_dt)s
+            AND
+            node2.when_posted < %(end_dt)s
+            AND
+            (
+                node1.when_posted >= %(begin_dt)s
+                OR
+                node2.when_posted >= %(begin_dt)s
+            )
+            AND
+            edge.total_wt > 0
+        ;
+    '''
+
+    args = {
+        'begin_dt': begin_day,
+        'end_dt': end_day
+    }
+
+    cursor.execute(sql, args)
+
+    # Partition by Newer Post
+    partitions = defaultdict(list)
+    for edge in cursor.fetchall():
+        newer, older = max(edge['day1'], edge['day2']), min(edge['day1'], edge['day2'])
+        partitions[newer].append((edge['node1_id'], edge['node2_id'], edge['weight'], older))
+
+    # Empty Days Are Written Too so Stale Partitions Are Replaced
+    for day in days(begin_day, end_day):
+        writePartition(store_dir, day, partitions.get(day, []))
+
+    return sum(len(edges) for edges in partitions.values())
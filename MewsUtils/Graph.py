@@ -1,40 +1,49 @@
 #!/usr/bin/env python3
 
-from . import Posts, Images
+from . import Posts, Images, Streaming
 
-def getCentralGraph(upper, lower, skip, central_amount, rel_amount):
-
-    # Initialize Return Structure
-    output = { 'nodes': [], 'links': [] }
+def iterCentralGraph(upper, lower, skip, central_amount, rel_amount, fields=None):
 
     # Call Central Posts
     posts, code = Posts.getCentralPosts(upper, lower, skip, central_amount)
     if code != 200:
         return posts, code
 
+    return centralGraphItems(posts, skip, rel_amount, fields), 200
+
+def centralGraphItems(posts, skip, rel_amount, fields=None):
+
     # Add Central Posts to Graph
     central = set()
     for post in posts:
         post['central'] = True
         post['svg'] = Images.getImageURL(post["id"])
-        output['nodes'].append(post)
+        yield 'node', post
         link = { 'source': post['id'], 'target': post['id'] }
-        output['links'].append(link)
+        yield 'link', link
         central.add(post['id'])
 
         # Call Related Posts
-        relPosts, code = Posts.getRelatedPosts(post['id'], skip, rel_amount)
+        relPosts, code = Posts.getRelatedPosts(post['id'], skip, rel_amount, fields)
         if code != 200:
-            return relPosts, code
+            yield 'error', (relPosts, code)
+            return
 
         # Add Related Posts to Graph
         # Note: We can add the link even if both nodes are central, but we don't want to ...
         # ... submit multiple instances of same node with different `central` attribute
         for neighbor in relPosts:
             link = { 'source': post['id'], 'target': neighbor['id'] }
-            output['links'].append(link)
+            yield 'link', link
             if neighbor['id'] in central: continue
             neighbor['central'] = False
-            output['nodes'].append(neighbor)
+            yield 'node', neighbor
+
+def getCentralGraph(upper, lower, skip, central_amount, rel_amount, fields=None):
+
+    # Initialize Return Structure
+    items, code = iterCentralGraph(upper, lower, skip, central_amount, rel_amount, fields)
+    if code != 200:
+        return items, code
 
-    return output, 200
+    return Streaming.collect(items)
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+
+'''
+' @file   GraphIndex.py
+' @desc   In-process copy of the post graph for /posts/<pid>/related, /posts/central and /graph/central.
+' @notes  Posts are rows sorted by id. Edges are CSR: the neighbors of row r are ...
+'         ... neighbors[offsets[r]:offsets[r + 1]], sorted by weight descending. Central posts ...
+'         ... are rows sorted by score descending.
+'         Only compact post columns are kept (no related_text/ocr_text or edge metadata); ...
+'         ... requests for other fields fall back to MySQL.
+'         syncGraph.py -g writes a snapshot; app.py loads it (or builds from MySQL if there is ...
+'         ... none yet) and swaps in a new index when the snapshot changes. An index is never ...
+'         ... mutated once built, so readers only need to grab CURRENT once per request.
+'''
+
+### Imports
+
+from datetime import datetime
+from bisect import bisect_left
+from array import array
+import threading
+import logging
+import pickle
+import math
+import time
+import os
+from . import Connection
+
+
+### Constants
+
+ENABLED = os.environ.get('MEWS_GRAPH_INDEX', '') not in ('', '0', 'off')
+SNAPSHOT_FILEPATH = os.environ.get('MEWS_GRAPH_INDEX_FILE', '/data/mews/graph_index/index.pickle')
+POLL_SECONDS = float(os.environ.get('MEWS_GRAPH_INDEX_POLL', 60))
+if POLL_SECONDS <= 0:
+    raise ValueError('MEWS_GRAPH_INDEX_POLL must be > 0')
+
+VERSION = 1
+FETCH_SIZE = 10000
+NULL = -1   # Stands for NULL in integer columns
+
+# Fields of /posts/<pid>/related the Index Can Serve
+RELATED_FIELDS = {'id', 'post_url', 'reposts', 'replies', 'likes', 'when_posted', 'user_id', 'total_wt', 'username', 'platform', 'image_url'}
+
+
+### Globals
+
+CURRENT = None
+logger = logging.getLogger(__name__)
+
+
+### Index
+
+def toTimestamp(value):
+    return value.timestamp() if value is not None else math.nan
+
+
+def fromTimestamp(value):
+    return datetime.fromtimestamp(value) if not math.isnan(value) else None
+
+
+def fromFloat(value):
+    return value if not math.isnan(value) else None
+
+
+def fromInt(value):
+    return value if value != NULL else None
+
+
+class GraphIndex:
+    '''
+    @desc   Read-only post graph; build with build() or load()
+    '''
+
+    def __init__(self):
+        self.built = None
+
+        # Posts
+        self.ids = array('q')
+        self.post_urls = []
+        self.reposts = array('q')
+        self.replies = array('q')
+        self.likes = array('q')
+        self.when_posted = array('d')
+        self.user_ids = array('q')
+        self.user_rows = array('i')
+        self.users = []             # (username, platform)
+
+        # Edges
+        self.offsets = array('q', [0])
+        self.neighbors = array('q')
+        self.weights = array('d')
+
+        # Centrality
+        self.central = array('q')
+        self.scores = array('d')
+        self.evaluated = array('d')
+
+    def row(self, pid):
+        r = bisect_left(self.ids, pid)
+        return r if r < len(self.ids) and self.ids[r] == pid else None
+
+    def post(self, r):
+        username, platform = self.users[self.user_rows[r]]
+        return {
+            'id': self.ids[r],
+            'post_url': self.post_urls[r],
+            'reposts': fromInt(self.reposts[r]),
+            'replies': fromInt(self.replies[r]),
+            'likes': fromInt(self.likes[r]),
+            'when_posted': fromTimestamp(self.when_posted[r]),
+            'user_id': self.user_ids[r],
+            'username': username,
+            'platform': platform
+        }
+
+    def related(self, pid, skip, amount, names):
+        '''
+        @desc    Top related posts of pid by weight, shaped like Posts.getRelatedPosts rows
+        @return  list of dicts with the given field names, or None if pid is not in the index
+        '''
+        r = self.row(pid)
+        if r is None:
+            return None
+
+        out = []
+        begin = self.offsets[r] + skip
+        end = min(self.offsets[r + 1], begin + amount)
+        for e in range(begin, end):
+            post = self.post(self.neighbors[e])
+            post['total_wt'] = fromFloat(self.weights[e])
+            out.append({name: post[name] for name in names})
+        return out
+
+    def centralPosts(self, lower_dt, upper_dt, amount):
+        '''
+        @desc    Highest scored posts evaluated within [lower_dt, upper_dt], shaped like Posts.getCentralPosts rows
+        '''
+        lower, upper = lower_dt.timestamp(), upper_dt.timestamp()
+        out = []
+        for i, r in enumerate(self.central):
+            if len(out) >= amount:
+                break
+            if not lower <= self.evaluated[i] <= upper:
+                continue
+            post = self.post(r)
+            del post['user_id']
+            post['image_url'] = None
+            post['score'] = self.scores[i]
+            post['evaluated'] = fromTimestamp(self.evaluated[i])
+            out.append(post)
+        return out
+
+
+### Building and Snapshots
+
+def build(cursor):
+    '''
+    @desc    Builds an index from mews_app
+    --
+    @param   cursor  dictionary cursor for mysql.connector
+    @return  GraphIndex
+    '''
+    index = GraphIndex()
+    index.built = datetime.now()
+
+    def rows(sql):
+        cursor.execute(sql)
+        while True:
+            batch = cursor.fetchmany(FETCH_SIZE)
+            if not batch:
+                break
+            yield from batch
+
+    # Posts and Their Users, by Id
+    user_rows = {}
+    for post in rows('''
+        SELECT
+            Posts.id as id, post_url, reposts, replies, likes, when_posted, user_id, username, platform
+        FROM
+            mews_app.Posts,
+            mews_app.Users
+        WHERE
+            Posts.user_id = Users.id
+        ORDER BY
+            Posts.id
+        ;
+    '''):
+        user = (post['username'], post['platform'])
+        if user not in user_rows:
+            user_rows[user] = len(index.users)
+            index.users.append(user)
+        index.ids.append(post['id'])
+        index.post_urls.append(post['post_url'])
+        index.reposts.append(post['reposts'] if post['reposts'] is not None else NULL)
+        index.replies.append(post['replies'] if post['replies'] is not None else NULL)
+        index.likes.append(post['likes'] if post['likes'] is not None else NULL)
+        index.when_posted.append(toTimestamp(post['when_posted']))
+        index.user_ids.append(post['user_id'])
+        index.user_rows.append(user_rows[user])
+
+    # Edges From Both Sides, Already Sorted by PostAdjacency's (post_id, total_wt DESC) Index
+    r = 0
+    for edge in rows('''
+        SELECT
+            post_id, other_id, total_wt
+        FROM
+            mews_app.PostAdjacency
+        ORDER BY
+            post_id, total_wt DESC
+        ;
+    '''):
+        while r < len(index.ids) and index.ids[r] < edge['post_id']:
+            index.offsets.append(len(index.neighbors))
+            r += 1
+        other = index.row(edge['other_id'])
+        if r == len(index.ids) or index.ids[r] != edge['post_id'] or other is None:
+            continue
+        index.neighbors.append(other)
+        index.weights.append(edge['total_wt'] if edge['total_wt'] is not None else math.nan)
+    while r < len(index.ids):
+        index.offsets.append(len(index.neighbors))
+        r += 1
+
+    # Centrality, Highest Score First
+    for central in rows('''
+        SELECT
+            post_id, score, evaluated
+        FROM
+            mews_app.PostCentrality
+        ORDER BY
+            score DESC
+        ;
+    '''):
+        r = index.row(central['post_id'])
+        if r is None:
+            continue
+        index.central.append(r)
+        index.scores.append(central['score'])
+        index.evaluated.append(toTimestamp(central['evaluated']))
+
+    return index
+
+
+def save(index, filepath=None):
+    '''
+    @desc   Atomically replaces the snapshot at filepath
+    '''
+    filepath = filepath or SNAPSHOT_FILEPATH
+    os.makedirs(os.path.dirname(filepath) or '.', exist_ok=True)
+    tmp_filepath = filepath + '.tmp'
+    with open(tmp_filepath, 'wb') as f:
+        pickle.dump((VERSION, index), f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_filepath, filepath)
+
+
+def load(filepath=None):
+    '''
+    @desc    Reads a snapshot written by save()
+    @return  GraphIndex, or None if it is from another version
+    '''
+    with open(filepath or SNAPSHOT_FILEPATH, 'rb') as f:
+        version, index = pickle.load(f)
+    return index if version == VERSION else None
+
+
+### Serving
+
+def install(index):
+    # Swapping the Reference Is Atomic; Requests Holding the Old Index Finish on It
+    global CURRENT
+    CURRENT = index
+
+
+def relatedRows(pid, skip, amount, names):
+    '''
+    @desc    Serves Posts.getRelatedPosts from the index
+    @return  rows, or None if there is no index, pid is unknown or a field is not indexed
+    '''
+    index = CURRENT
+    if index is None or not set(names) <= RELATED_FIELDS:
+        return None
+    return index.related(pid, skip, amount, names)
+
+
+def centralRows(lower_dt, upper_dt, amount):
+    '''
+    @desc    Serves Posts.getCentralPosts from the index
+    @return  rows, or None if there is no index
+    '''
+    index = CURRENT
+    if index is None:
+        return None
+    return index.centralPosts(lower_dt, upper_dt, amount)
+
+
+def watch(filepath, interval, connect):
+    '''
+    @desc   Keeps CURRENT up to date with the snapshot, building from MySQL while there is none
+    '''
+    loaded_mtime = None
+    while True:
+        try:
+            try:
+                mtime = os.stat(filepath).st_mtime
+            except FileNotFoundError:
+                mtime = None
+
+            if mtime is not None and mtime != loaded_mtime:
+                start = time.perf_counter()
+                index = load(filepath)
+                if index is not None:
+                    install(index)
+                    logger.info(f'Loaded graph index {filepath} in {time.perf_counter() - start:.1f}s')
+                loaded_mtime = mtime
+            elif mtime is None and CURRENT is None:
+                start = time.perf_counter()
+                cnx = connect()
+                try:
+                    install(build(cnx.cursor(dictionary=True)))
+                finally:
+                    cnx.close()
+                logger.info(f'Built graph index from MySQL in {time.perf_counter() - start:.1f}s')
+        except Exception:
+            logger.exception('Could not refresh graph index')
+        time.sleep(interval)
+
+
+def register(app):
+    '''
+    @desc   Starts loading and watching the index if MEWS_GRAPH_INDEX is set
+    '''
+    if not ENABLED:
+        return
+    thread = threading.Thread(target=watch, args=(SNAPSHOT_FILEPATH, POLL_SECONDS, Connection.connect), name='graph-index', daemon=True)
+    thread.start()
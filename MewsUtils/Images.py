@@ -7,7 +7,7 @@ import json
 import os
 import mysql.connector
 from flask import jsonify, send_file, abort, request
-from . import Connection
+from . import Connection, Thumbnails
 
 ### Functions
 
@@ -17,10 +17,14 @@ def getImageURL(pid):
 def getHeatmapURL(pid):
     return f'{request.url_root}posts/{pid}/heatmap'
 
-def getPostImage(pid):
+def getPostImage(pid, size=None):
+    # Check Size
+    if size is not None and size <= 0:
+        return {'error': 'Invalid parameter `size`'}, 400
+
     # Connect to DB
     try:
-        cnx = mysql.connector.connect(**Connection.DB_CONFIG)
+        cnx = Connection.connect()
     except mysql.connector.Error as err:
         return {'error': 'Could not connect to DB'}, 400
     cursor = cnx.cursor(dictionary=True)
@@ -39,20 +43,38 @@ def getPostImage(pid):
 
     args = { 'pid':pid }
 
-    cursor.execute(sql, args)
+    # Release the Connection Before Touching Files
+    try:
+        cursor.execute(sql, args)
+        result = cursor.fetchone()
+    finally:
+        cnx.close()
 
     parent_dir = '/data/mews/'
-    result = cursor.fetchone()
     if result is None:
         abort(404)
     filepath = parent_dir + result['filepath']
 
+    # Serve a Cached Downscaled Copy if Asked
+    if size is not None:
+        try:
+            filepath = Thumbnails.derivative(filepath, size)
+        except FileNotFoundError:
+            abort(404)
+        except OSError:
+            # Source Pillow Cannot Decode (Truncated, Not an Image): Send It As Is
+            pass
+
     return send_file(filepath, 'image/jpeg')
 
-def getPostHeatmap(pid):
+def getPostHeatmap(pid, size=None):
+    # Check Size
+    if size is not None and size <= 0:
+        return {'error': 'Invalid parameter `size`'}, 400
+
     # Connect to DB
     try:
-        cnx = mysql.connector.connect(**Connection.DB_CONFIG)
+        cnx = Connection.connect()
     except mysql.connector.Error as err:
         return {'error': 'Could not connect to DB'}, 400
     cursor = cnx.cursor(dictionary=True)
@@ -71,12 +93,26 @@ def getPostHeatmap(pid):
 
     args = { 'pid':pid }
 
-    cursor.execute(sql, args)
+    # Release the Connection Before Touching Files
+    try:
+        cursor.execute(sql, args)
+        result = cursor.fetchone()
+    finally:
+        cnx.close()
 
     parent_dir = '/data/mews/'
-    result = cursor.fetchone()
     if result is None:
         abort(404)
     filepath = parent_dir + result['filepath']
 
+    # Serve a Cached Downscaled Copy if Asked
+    if size is not None:
+        try:
+            filepath = Thumbnails.derivative(filepath, size)
+        except FileNotFoundError:
+            abort(404)
+        except OSError:
+            # Source Pillow Cannot Decode (Truncated, Not an Image): Send It As Is
+            pass
+
     return send_file(filepath, 'image/jpeg')
\ No newline at end of file
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+
+'''
+' @file   Metrics.py
+' @desc   Per-request DB instrumentation, Server-Timing header and Prometheus /metrics.
+' @notes  Stats are per process; behind a multi-process server each worker reports its own.
+'''
+
+### Imports
+
+import threading
+import time
+from flask import g, has_app_context, request
+from . import SingleFlight, SlowQueries
+
+
+### Constants
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+### Globals
+
+LOCK = threading.Lock()
+ROUTES = {}
+
+
+### DB Instrumentation
+
+def requestStats():
+    '''
+    @desc    Returns the DB stats of the current request, or None outside of one
+    '''
+    if not has_app_context():
+        return None
+    if 'db_stats' not in g:
+        g.db_stats = {'connections': 0, 'connect_s': 0.0, 'queries': 0, 'db_s': 0.0, 'rows': 0}
+    return g.db_stats
+
+
+class InstrumentedCursor:
+    '''
+    @desc   Cursor proxy adding time spent in execute/fetch and rows fetched to the request's stats
+    '''
+
+    def __init__(self, cursor, config):
+        self._cursor = cursor
+        self._config = config
+
+    def _timed(self, method, args, kwargs, query=False):
+        stats = requestStats()
+        start = time.perf_counter()
+        result = getattr(self._cursor, method)(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+        if query:
+            params = args[1] if len(args) > 1 else kwargs.get('params', kwargs.get('seq_params'))
+            SlowQueries.check(self._config, args[0] if args else kwargs.get('operation'), params, elapsed, many=(method == 'executemany'))
+        if stats is not None:
+            stats['db_s'] += elapsed
+            if query:
+                stats['queries'] += 1
+            elif method == 'fetchone':
+                stats['rows'] += result is not None
+            else:
+                stats['rows'] += len(result)
+        return result
+
+    def execute(self, *args, **kwargs):
+        return self._timed('execute', args, kwargs, query=True)
+
+    def executemany(self, *args, **kwargs):
+        return self._timed('executemany', args, kwargs, query=True)
+
+    def fetchone(self, *args, **kwargs):
+        return self._timed('fetchone', args, kwargs)
+
+    def fetchmany(self, *args, **kwargs):
+        return self._timed('fetchmany', args, kwargs)
+
+    def fetchall(self, *args, **kwargs):
+        return self._timed('fetchall', args, kwargs)
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class InstrumentedConnection:
+    '''
+    @desc   Connection proxy handing out InstrumentedCursor
+    '''
+
+    def __init__(self, cnx, config):
+        self._cnx = cnx
+        self._config = config
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._cnx.cursor(*args, **kwargs), self._config)
+
+    def __getattr__(self, name):
+        return getattr(self._cnx, name)
+
+
+def connect(opener, **config):
+    '''
+    @desc    Opens a connection with opener(**config), timing it against the current request
+    @return  InstrumentedConnection
+    '''
+    stats = requestStats()
+    start = time.perf_counter()
+    cnx = opener(**config)
+    if stats is not None:
+        stats['connections'] += 1
+        stats['connect_s'] += time.perf_counter() - start
+    return InstrumentedConnection(cnx, config)
+
+
+### Flask Hooks
+
+def beforeRequest():
+    g.request_start = time.perf_counter()
+
+
+def afterRequest(response):
+    elapsed = time.perf_counter() - g.pop('request_start', time.perf_counter())
+    stats = requestStats()
+
+    # Server-Timing for Browser Dev Tools
+    response.headers['Server-Timing'] = ', '.join([
+        f'connect;dur={stats["connect_s"] * 1000:.2f};desc="{stats["connections"]} connections"',
+        f'db;dur={stats["db_s"] * 1000:.2f};desc="{stats["queries"]} queries, {stats["rows"]} rows"',
+        f'total;dur={elapsed * 1000:.2f}'
+    ])
+
+    # Aggregate per Route
+    route = request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+    with LOCK:
+        entry = ROUTES.setdefault(route, {
+            'buckets': [0] * len(BUCKETS),
+            'count': 0,
+            'sum': 0.0,
+            'connections': 0,
+            'connect_s': 0.0,
+            'queries': 0,
+            'db_s': 0.0,
+            'rows': 0
+        })
+        for i, bound in enumerate(BUCKETS):
+            if elapsed <= bound:
+                entry['buckets'][i] += 1
+        entry['count'] += 1
+        entry['sum'] += elapsed
+        for key in ('connections', 'connect_s', 'queries', 'db_s', 'rows'):
+            entry[key] += stats[key]
+
+    return response
+
+
+def register(app):
+    '''
+    @desc   Instruments every request of app and serves GET /metrics
+    '''
+    app.before_request(beforeRequest)
+    app.after_request(afterRequest)
+    app.add_url_rule('/metrics', 'metrics', metrics, methods=['GET'])
+
+
+### Exposition
+
+def render():
+    '''
+    @desc    Renders the aggregated stats in Prometheus text format
+    '''
+    counters = [
+        ('mews_db_connections_total', 'counter', 'DB connections opened', 'connections'),
+        ('mews_db_connect_seconds_total', 'counter', 'Time spent opening DB connections', 'connect_s'),
+        ('mews_db_queries_total', 'counter', 'SQL statements executed', 'queries'),
+        ('mews_db_seconds_total', 'counter', 'Time spent executing and fetching SQL', 'db_s'),
+        ('mews_db_rows_total', 'counter', 'Rows fetched', 'rows')
+    ]
+
+    with LOCK:
+        routes = {route: dict(entry, buckets=list(entry['buckets'])) for route, entry in ROUTES.items()}
+
+    lines = [
+        '# HELP mews_request_duration_seconds Request latency by route',
+        '# TYPE mews_request_duration_seconds histogram'
+    ]
+    for route, entry in sorted(routes.items()):
+        label = route.replace('\\', '\\\\').replace('"', '\\"')
+        for bound, count in zip(BUCKETS, entry['buckets']):
+            lines.append(f'mews_request_duration_seconds_bucket{{route="{label}",le="{bound}"}} {count}')
+        lines.append(f'mews_request_duration_seconds_bucket{{route="{label}",le="+Inf"}} {entry["count"]}')
+        lines.append(f'mews_request_duration_seconds_sum{{route="{label}"}} {entry["sum"]}')
+        lines.append(f'mews_request_duration_seconds_count{{route="{label}"}} {entry["count"]}')
+
+    for name, kind, help, key in counters:
+        lines.append(f'# HELP {name} {help} by route')
+        lines.append(f'# TYPE {name} {kind}')
+        for route, entry in sorted(routes.items()):
+            label = route.replace('\\', '\\\\').replace('"', '\\"')
+            lines.append(f'{name}{{route="{label}"}} {entry[key]}')
+
+    lines.append('# HELP mews_singleflight_requests_total Coalesced routes by role (follower = served from another request\'s computation)')
+    lines.append('# TYPE mews_singleflight_requests_total counter')
+    for route, entry in sorted(SingleFlight.counts().items()):
+        label = route.replace('\\', '\\\\').replace('"', '\\"')
+        for role, count in entry.items():
+            lines.append(f'mews_singleflight_requests_total{{route="{label}",role="{role}"}} {count}')
+
+    return '\n'.join(lines) + '\n'
+
+
+def metrics():
+    return render(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
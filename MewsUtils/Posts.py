@@ -8,12 +8,82 @@ import os
 import mysql.connector
 from datetime import datetime, timedelta
 import dateutil.parser as dt
-from . import Connection, Images
+from . import Boxes, Connection, GraphIndex, Images, SearchIndex, TopNeighbors, Trending
+
+
+### Constants
+
+MAX_BATCH = 500
+
+# Selectable Fields (name: SQL expression)
+POST_COLUMNS = {
+    'id': 'Posts.id',
+    'post_url': 'post_url',
+    'reposts': 'reposts',
+    'replies': 'replies',
+    'likes': 'likes',
+    'when_posted': 'when_posted',
+    'user_id': 'user_id',
+    'related_text': 'related_text',
+    'ocr_text': 'ocr_text',
+    'when_scraped': 'when_scraped',
+    'when_updated': 'when_updated',
+    'platform': 'platform',
+    'username': 'username'
+}
+RELATED_COLUMNS = {
+    'id': 'A.id',
+    'post_url': 'A.post_url',
+    'reposts': 'A.reposts',
+    'replies': 'A.replies',
+    'likes': 'A.likes',
+    'when_posted': 'A.when_posted',
+    'user_id': 'A.user_id',
+    'related_text': 'A.related_text',
+    'ocr_text': 'A.ocr_text',
+    'when_scraped': 'A.when_scraped',
+    'when_updated': 'A.when_updated',
+    'rel_txt_wt': 'B.rel_txt_wt',
+    'rel_txt_meta': 'B.rel_txt_meta',
+    'ocr_meta': 'B.ocr_meta',
+    'sub_img_wt': 'B.sub_img_wt',
+    'ocr_wt': 'B.ocr_wt',
+    'scaled_sub_img_wt': 'B.scaled_sub_img_wt',
+    'total_wt': 'B.total_wt',
+    'username': 'username',
+    'platform': 'platform'
+}
 
 
 ### Functions
 
-def getTrendingPosts(upper, lower, skip, amount, getBoxes, searchTerm=None):
+def parseFields(fields, columns, derived=()):
+    '''
+    @desc    Parses a `fields` parameter against what a query can return
+    --
+    @param   fields   comma separated field names, or None for all of them
+    @param   columns  dict of selectable field name to SQL expression
+    @param   derived  field names filled in after the query (e.g. image_url)
+    @return  names of the columns to select, set of requested fields (id is always included)
+    '''
+    if fields is None:
+        return list(columns), set(columns) | set(derived)
+
+    wanted = {field.strip() for field in fields.split(',') if field.strip()}
+    if not wanted or not wanted <= set(columns) | set(derived):
+        raise ValueError(f'Unknown field(s) in {fields}')
+    wanted.add('id')
+
+    return [name for name in columns if name in wanted], wanted
+
+def selectList(names, columns):
+    return ',\n        '.join(f'{columns[name]} as {name}' for name in names)
+
+def getTrendingPosts(upper, lower, skip, amount, getBoxes, searchTerm=None, fields=None, hashtag=None, user=None):
+    # Define Equation
+    trendingEquation = Trending.TRENDING_EQUATION
+    columns = dict(POST_COLUMNS, score=trendingEquation)
+
     # Check Arguments
     try:
         assert(skip >= 0)
@@ -22,34 +92,113 @@ def getTrendingPosts(upper, lower, skip, amount, getBoxes, searchTerm=None):
         lower_dt = dt.parse(lower)
     except:
         return {'error': 'Invalid argument(s).'}, 400
-
-    # Define Equation
-    trendingEquation ='(LOG(reposts + 1) + LOG(replies + 1) + LOG(likes + 1) / 2 - DATEDIFF(CURDATE(), when_posted))'
+    try:
+        names, wanted = parseFields(fields, columns, ('image_url', 'heatmap_url', 'boxes'))
+    except ValueError:
+        return {'error': 'Invalid parameter `fields`'}, 400
 
     # Connect to DB
     try:
-        cnx = mysql.connector.connect(**Connection.DB_CONFIG)
+        cnx = Connection.connect()
     except mysql.connector.Error as err:
         return {'error': 'Could not connect to DB'}, 400
     cursor = cnx.cursor(dictionary=True)
 
+    try:
+        # Resolve Hashtag/User Filters to Ids Through the Prefix Index
+        filters = {}
+        if hashtag is not None or user is not None:
+            index = SearchIndex.current(cursor)
+            if hashtag is not None:
+                filters['hashtag_ids'] = SearchIndex.ids(index, 'hashtag', hashtag)
+            if user is not None:
+                filters['user_ids'] = SearchIndex.ids(index, 'user', user)
+
+        # Page Through the Precomputed Ranking Unless Searching or Filtering
+        ranking = Trending.page(cursor, lower_dt, upper_dt, skip, amount) if searchTerm is None and not filters else None
+        if ranking is not None:
+            rows = trendingFromRanking(cursor, ranking, names)
+        elif not all(filters.values()):
+            rows = []
+        else:
+            rows = rankTrending(cursor, lower_dt, upper_dt, skip, amount, searchTerm, names, columns, **filters)
+
+        # Extract Information
+        trendingPosts = []
+        for post in rows:
+            if 'image_url' in wanted:
+                post['image_url'] = Images.getImageURL(post['id'])
+            if 'heatmap_url' in wanted:
+                post['heatmap_url'] = Images.getHeatmapURL(post['id'])
+            trendingPosts.append(post)
+
+        # Get Boxes for Each Post
+        if getBoxes is True and 'boxes' in wanted:
+            boxes = Boxes.loadBoxes(cursor, [post['id'] for post in trendingPosts])
+            for post in trendingPosts:
+                post['boxes'] = boxes[post['id']]['linked_boxes']
+
+        return trendingPosts, 200
+    finally:
+        # Clean Up
+        cnx.close()
+
+
+def trendingFromRanking(cursor, ranking, names):
+    '''
+    @desc    Looks up the posts of a page of Trending.page() by primary key, keeping its order
+    '''
+    if not ranking:
+        return []
+
+    sql = f'''
+    SELECT
+        {selectList([name for name in names if name != 'score'], POST_COLUMNS)}
+    FROM
+        mews_app.Posts,
+        mews_app.Users
+    WHERE
+        Posts.id IN ({','.join(['%s'] * len(ranking))})
+        AND
+        Posts.user_id = Users.id
+    ;
+    '''
+    cursor.execute(sql, [pid for pid, _ in ranking])
+    posts = {post['id']: post for post in cursor.fetchall()}
+
+    rows = []
+    for pid, score in ranking:
+        if pid not in posts:
+            continue
+        if 'score' in names:
+            posts[pid]['score'] = score
+        rows.append(posts[pid])
+    return rows
+
+
+def rankTrending(cursor, lower_dt, upper_dt, skip, amount, searchTerm, names, columns, hashtag_ids=None, user_ids=None):
+    trendingEquation = columns['score']
+
+    # Indexed Filters (HashtagsInPosts Is Keyed by hashtag_id)
+    filters = ''
+    args = {}
+    if hashtag_ids is not None:
+        placeholders = ', '.join(f'%(hashtag_{i})s' for i in range(len(hashtag_ids)))
+        filters += f'''
+        AND
+        Posts.id IN (SELECT post_id FROM mews_app.HashtagsInPosts WHERE hashtag_id IN ({placeholders}))'''
+        args.update({f'hashtag_{i}': hid for i, hid in enumerate(hashtag_ids)})
+    if user_ids is not None:
+        placeholders = ', '.join(f'%(user_{i})s' for i in range(len(user_ids)))
+        filters += f'''
+        AND
+        Posts.user_id IN ({placeholders})'''
+        args.update({f'user_{i}': uid for i, uid in enumerate(user_ids)})
+
     # Create Query
     sql = f'''
     SELECT
-        Posts.id as id, 
-        post_url, 
-        reposts,
-        replies, 
-        likes,
-        when_posted, 
-        user_id,
-        related_text, 
-        ocr_text,
-        when_scraped, 
-        when_updated,
-        platform,
-        username,
-        {trendingEquation} as score
+        {selectList(names, columns)}
     FROM
         mews_app.Posts,
         mews_app.Users
@@ -64,14 +213,14 @@ def getTrendingPosts(upper, lower, skip, amount, getBoxes, searchTerm=None):
             related_text LIKE CONCAT('%', %(search_term)s, '%') 
             OR 
             ocr_text LIKE CONCAT('%', %(search_term)s, '%')
-        )
+        ){filters}
     ORDER BY
         {trendingEquation} DESC
     LIMIT 
         %(skip)s, %(amount)s
     ;
     '''
-    args = {
+    args.update({
         'lower_dt': lower_dt,
         'upper_dt': upper_dt,
         'trendingEquation': trendingEquation,
@@ -79,52 +228,14 @@ def getTrendingPosts(upper, lower, skip, amount, getBoxes, searchTerm=None):
         'amount': amount,
         'search_disabled': searchTerm is None,
         'search_term': searchTerm if searchTerm else ''
-    }
+    })
 
     cursor.execute(sql, args)
 
-    # Extract Information
-    trendingPosts = []
-    for post in cursor.fetchall():
-        post['image_url'] = Images.getImageURL(post['id'])
-        post['heatmap_url'] = Images.getHeatmapURL(post['id'])
-        trendingPosts.append(post)
+    return cursor.fetchall()
 
-    # Get Boxes for Each Post
-    if getBoxes is True:
-        for post in trendingPosts:
 
-            sql = '''
-            SELECT 
-                sub_img_meta as coords,
-                IF(post1_id=%(pid)s, post2_id, post1_id) as other_post_id
-            FROM 
-                mews_app.PostRelatedness
-            WHERE
-                (
-                    post1_id = %(pid)s
-                    OR 
-                    post2_id = %(pid)s
-                )
-                AND
-                sub_img_meta IS NOT NULL
-            ;
-            '''
-            args = { 'pid': post['id'] }
-            cursor.execute(sql, args)
-
-            boxes = []
-            for box in cursor.fetchall():
-                boxes.append(box)
-
-            post['boxes'] = boxes
-
-    cnx.close()
-
-    return trendingPosts, 200
-
-
-def getPost(pid):
+def getPost(pid, fields=None):
 
     # Check PID
     try:
@@ -132,75 +243,145 @@ def getPost(pid):
         assert(pid >= 0)
     except:
         return {'error': 'Invalid post id.'}, 400
+    try:
+        names, wanted = parseFields(fields, POST_COLUMNS, ('image_url', 'heatmap_url', 'boxes'))
+    except ValueError:
+        return {'error': 'Invalid parameter `fields`'}, 400
 
     # Connect to DB
     try:
-        cnx = mysql.connector.connect(**Connection.DB_CONFIG)
+        cnx = Connection.connect()
     except mysql.connector.Error as err:
         return {'error': 'Could not connect to DB'}, 400
     cursor = cnx.cursor(dictionary=True)
 
-    # Format Query
-    sql = '''
-    SELECT
-        Posts.id as id, 
-        post_url, 
-        reposts,
-        replies, 
-        likes,
-        when_posted, 
-        user_id,
-        related_text, 
-        ocr_text,
-        when_scraped, 
-        when_updated,
-        platform,
-        username
-    FROM 
-        mews_app.Posts,
-        mews_app.Users
-    WHERE 
-        Posts.id = %(pid)s
-        AND
-        Posts.user_id = Users.id
-    ;
-    '''
-    args = { 'pid': pid }
+    try:
+        # Format Query
+        sql = f'''
+        SELECT
+            {selectList(names, POST_COLUMNS)}
+        FROM 
+            mews_app.Posts,
+            mews_app.Users
+        WHERE 
+            Posts.id = %(pid)s
+            AND
+            Posts.user_id = Users.id
+        ;
+        '''
+        args = { 'pid': pid }
 
-    # Query DB
-    cursor.execute(sql, args)
+        # Query DB
+        cursor.execute(sql, args)
 
-    # Extract Information
-    post = cursor.fetchone()
-    if post is None:
-        return {'error': 'Could not execute'}, 400
+        # Extract Information
+        post = cursor.fetchone()
+        if post is None:
+            return {'error': 'Could not execute'}, 400
 
-    post['image_url'] = Images.getImageURL(post['id'])
-    post['heatmap_url'] = Images.getHeatmapURL(post['id'])
+        if 'image_url' in wanted:
+            post['image_url'] = Images.getImageURL(post['id'])
+        if 'heatmap_url' in wanted:
+            post['heatmap_url'] = Images.getHeatmapURL(post['id'])
 
-    sql = '''
-    SELECT DISTINCT sub_img_meta
-    FROM mews_app.PostRelatedness
-    WHERE post1_id = %(pid)s
-    ;
-    '''
-    args = { 'pid': pid }
+        if 'boxes' not in wanted:
+            return post, 200
 
-    # Query DB
-    cursor.execute(sql, args)
+        # Precomputed by syncGraph.py
+        boxes = Boxes.loadBoxes(cursor, [pid])[pid]['boxes']
 
-    boxes = []
-    for result in cursor.fetchall():
-        (box,) = result
-        boxes.append(box)
+        post['boxes'] = boxes
 
-    post['boxes'] = boxes
-        
-    cnx.close()
+        return post, 200
+    finally:
+        # Clean Up
+        cnx.close()
 
-    return post, 200
+def getPosts(pids):
+
+    # Check PIDs, Keeping Request Order
+    if not isinstance(pids, list) or len(pids) > MAX_BATCH:
+        return {'error': f'Provide a list of at most {MAX_BATCH} post ids.'}, 400
+    valid = []
+    for pid in pids:
+        try:
+            pid = int(pid)
+            assert(pid >= 0)
+            valid.append(pid)
+        except:
+            pass
+    unique = list(dict.fromkeys(valid))
 
-def getRelatedPosts(pid, skip, amount):
+    posts = {}
+    boxes = {pid: [] for pid in unique}
+    if unique:
+        # Connect to DB
+        try:
+            cnx = Connection.connect()
+        except mysql.connector.Error as err:
+            return {'error': 'Could not connect to DB'}, 400
+        cursor = cnx.cursor(dictionary=True)
+
+        try:
+            # Format Query
+            placeholders = ','.join(['%s'] * len(unique))
+            sql = f'''
+            SELECT
+                Posts.id as id, 
+                post_url, 
+                reposts,
+                replies, 
+                likes,
+                when_posted, 
+                user_id,
+                related_text, 
+                ocr_text,
+                when_scraped, 
+                when_updated,
+                platform,
+                username
+            FROM 
+                mews_app.Posts,
+                mews_app.Users
+            WHERE 
+                Posts.id IN ({placeholders})
+                AND
+                Posts.user_id = Users.id
+            ;
+            '''
+
+            # Query DB
+            cursor.execute(sql, unique)
+            for post in cursor.fetchall():
+                post['image_url'] = Images.getImageURL(post['id'])
+                post['heatmap_url'] = Images.getHeatmapURL(post['id'])
+                posts[post['id']] = post
+
+            # Precomputed by syncGraph.py
+            for pid, summary in Boxes.loadBoxes(cursor, unique).items():
+                boxes[pid] = summary['boxes']
+        finally:
+            # Clean Up
+            cnx.close()
+
+    # One Item per Requested ID
+    results = []
+    for pid in pids:
+        try:
+            key = int(pid)
+            assert(key >= 0)
+        except:
+            results.append({'id': pid, 'found': False, 'error': 'Invalid post id.'})
+            continue
+        if key not in posts:
+            results.append({'id': key, 'found': False, 'error': 'Post not found.'})
+            continue
+        post = dict(posts[key], boxes=boxes[key])
+        results.append({'id': key, 'found': True, 'post': post})
+
+    return results, 200
+
+def getRelatedPosts(pid, skip, amount, fields=None):
 
     # parse args
     try:
@@ -219,103 +400,165 @@ def getRelatedPosts(pid, skip, amount):
     except:
         return {'error': 'Invalid parameter `amount`'}, 400
 
+    try:
+        names, wanted = parseFields(fields, RELATED_COLUMNS, ('image_url',))
+    except ValueError:
+        return {'error': 'Invalid parameter `fields`'}, 400
+
+    # Serve From the In-Memory Graph Index if It Has Everything Asked For
+    rows = GraphIndex.relatedRows(pid, skip, amount, names)
+    if rows is not None:
+        return formatRelated(pid, rows, wanted), 200
+
+    # Relatedness Columns Carried Through the Subquery, Joined Back Only if Asked For
+    relatedness = [name for name in names if RELATED_COLUMNS[name].startswith('B.') and name != 'total_wt']
+    edgeJoin = '''
+                JOIN mews_app.PostRelatedness AS R
+                ON
+                R.post1_id = IF(Adj.outgoing, Adj.post_id, Adj.other_id)
+                AND
+                R.post2_id = IF(Adj.outgoing, Adj.other_id, Adj.post_id)''' if relatedness else ''
+
     # Connect to DB
     try:
-        cnx = mysql.connector.connect(**Connection.DB_CONFIG)
+        cnx = Connection.connect()
     except mysql.connector.Error as err:
         return {'error': 'Could not connect to DB'}, 400
     cursor = cnx.cursor()
 
-    # Constants to be Tuned
-    REL_TXT_WEIGHT = 1
-    SUB_IMG_WEIGHT = 1
-    OCR_WEIGHT = 1
-
-    # Query Mews-App DB
-    cursor = cnx.cursor(dictionary=True)
-    query = '''
-        SELECT
-            A.id as id, 
-            A.image_url,
-            A.post_url, 
-            A.reposts,
-            A.replies, 
-            A.likes,
-            A.when_posted, 
-            A.user_id,
-            A.related_text, 
-            A.ocr_text,
-            A.when_scraped, 
-            A.when_updated,
-            B.rel_txt_wt,
-            B.rel_txt_meta,
-            B.ocr_meta,
-            B.sub_img_wt,
-            B.ocr_wt,
-            B.scaled_sub_img_wt,
-            B.total_wt,
-            username,
-            platform
-        FROM 
-            mews_app.Posts AS A,
-            mews_app.Users,
-            (SELECT 
-                post1_id,
-                post2_id,
-                IF(post1_id = %(post_id)s, post2_id, post1_id) AS rel_id,
-                rel_txt_wt,
-                rel_txt_meta,
-                ocr_meta,
-                sub_img_wt,
-                ocr_wt,
-                scaled_sub_img_wt,
-                total_wt
+    try:
+        # Constants to be Tuned
+        REL_TXT_WEIGHT = 1
+        SUB_IMG_WEIGHT = 1
+        OCR_WEIGHT = 1
+
+        # Serve From the Precomputed Top-K List if It Reaches Far Enough
+        cursor = cnx.cursor(dictionary=True)
+        rows = relatedFromTopNeighbors(cursor, pid, skip, amount, names)
+        if rows is not None:
+            return formatRelated(pid, rows, wanted), 200
+
+        # Query Mews-App DB
+        query = f'''
+            SELECT
+                {selectList(names, RELATED_COLUMNS)}
             FROM 
-                mews_app.PostRelatedness
+                mews_app.Posts AS A,
+                mews_app.Users,
+                (SELECT
+                    Adj.other_id AS rel_id,
+                    {''.join('R.' + name + ',' for name in relatedness)}
+                    Adj.total_wt AS total_wt
+                FROM
+                    mews_app.PostAdjacency AS Adj{edgeJoin}
+                WHERE
+                    Adj.post_id = %(post_id)s
+                ORDER BY
+                    Adj.total_wt DESC
+                LIMIT
+                    %(skip)s, %(amount)s
+                ) AS B
             WHERE
-                post1_id = %(post_id)s
-                OR
-                post2_id = %(post_id)s
-            ORDER BY
-                total_wt DESC
-            LIMIT
-                %(skip)s, %(amount)s 
-            ) AS B
+                A.id = B.rel_id
+                AND
+                A.user_id = Users.id
+            ;
+        '''
+
+        # Arguments for Query
+        args = {
+            'rel_txt_wt': REL_TXT_WEIGHT,
+            'sub_img_wt': SUB_IMG_WEIGHT,
+            'ocr_wt': OCR_WEIGHT,
+            'post_id': pid,
+            'skip': skip,
+            'amount': amount
+        }
+
+        # Execute Query
+        cursor.execute(query, args)
+        results = formatRelated(pid, cursor.fetchall(), wanted)
+
+        # Return Results
+        return results, 200
+    finally:
+        # Clean Up
+        cnx.close()
+
+
+def relatedFromTopNeighbors(cursor, pid, skip, amount, names):
+    '''
+    @desc    Pages through a post's PostTopNeighbors list (see TopNeighbors.py)
+    @return  rows like getRelatedPosts' query, or None if the list does not cover the page
+    '''
+    neighbors = TopNeighbors.loadTopNeighbors(cursor, pid)
+    if neighbors is None or (skip + amount > TopNeighbors.TOP_K and len(neighbors) >= TopNeighbors.TOP_K):
+        return None
+    page = neighbors[skip:skip + amount]
+    if not page:
+        return []
+    other_ids = [other_id for other_id, _ in page]
+
+    # Look Up the Neighbors by Primary Key
+    sql = f'''
+        SELECT
+            {selectList([name for name in names if not RELATED_COLUMNS[name].startswith('B.')], RELATED_COLUMNS)}
+        FROM
+            mews_app.Posts AS A,
+            mews_app.Users
         WHERE
-            A.id = B.rel_id
+            A.id IN ({','.join(['%s'] * len(page))})
             AND
             A.user_id = Users.id
         ;
     '''
-
-    # Arguments for Query
-    args = {
-        'rel_txt_wt': REL_TXT_WEIGHT,
-        'sub_img_wt': SUB_IMG_WEIGHT,
-        'ocr_wt': OCR_WEIGHT,
-        'post_id': pid,
-        'skip': skip,
-        'amount': amount
-    }
-
-    # Execute Query
-    cursor.execute(query, args)
-
+    cursor.execute(sql, other_ids)
+    posts = {post['id']: post for post in cursor.fetchall()}
+
+    # Edge Metadata of Just This Page, Stored Under Either Direction
+    relatedness = [name for name in names if RELATED_COLUMNS[name].startswith('B.') and name != 'total_wt']
+    edges = {}
+    if relatedness:
+        placeholders = ','.join(['%s'] * len(page))
+        sql = f'''
+            SELECT
+                IF(post1_id = %s, post2_id, post1_id) AS other_id,
+                {', '.join(relatedness)}
+            FROM
+                mews_app.PostRelatedness
+            WHERE
+                (post1_id = %s AND post2_id IN ({placeholders}))
+                OR
+                (post2_id = %s AND post1_id IN ({placeholders}))
+            ;
+        '''
+        cursor.execute(sql, [pid, pid] + other_ids + [pid] + other_ids)
+        edges = {edge.pop('other_id'): edge for edge in cursor.fetchall()}
+
+    # Keep List Order
+    rows = []
+    for other_id, weight in page:
+        if other_id not in posts:
+            continue
+        if 'total_wt' in names:
+            posts[other_id]['total_wt'] = weight
+        if relatedness:
+            posts[other_id].update(edges.get(other_id) or dict.fromkeys(relatedness))
+        rows.append(posts[other_id])
+    return rows
+
+
+def formatRelated(pid, rows, wanted):
     # Process Results
     results = []
-    for result in cursor.fetchall():
+    for result in rows:
         try:
-            result['image_url'] = Images.getImageURL(pid)
+            if 'image_url' in wanted:
+                result['image_url'] = Images.getImageURL(pid)
             results.append(result)
         except:
             pass
-
-    # Clean Up
-    cursor.close()
-    cnx.close()
-
-    # Return Results
-    return results, 200
+    return results
 
 
 def getCentralPosts(upper, lower, skip, amount):
@@ -329,81 +572,92 @@ def getCentralPosts(upper, lower, skip, amount):
     except:
         return {'error': 'Invalid argument(s).'}, 400
 
+    # Serve From the In-Memory Graph Index if Loaded
+    rows = GraphIndex.centralRows(lower_dt, upper_dt, amount)
+    if rows is not None:
+        return formatCentral(rows), 200
+
     # Connect to DB
     try:
-        cnx = mysql.connector.connect(**Connection.DB_CONFIG)
+        cnx = Connection.connect()
     except mysql.connector.Error as err:
         return {'error': 'Could not connect to DB'}, 400
     cursor = cnx.cursor(dictionary=True)
 
-    # Create Query
-    # Grabs 'amount' number of ordered central nodes within time frame, then grabs ...
-    # ... their post information, then grabs corresponding user info
-    sql = '''
-    SELECT 
-        post.id as id, 
-        post.image_url, 
-        post.post_url, 
-        post.reposts, 
-        post.replies, 
-        post.likes, 
-        post.when_posted, 
-        post.score, 
-        post.evaluated,
-        username,
-        platform
-    FROM
-        mews_app.Users,
-        (SELECT
-            id, 
-            image_url, 
-            post_url, 
-            reposts, 
-            replies, 
-            likes, 
-            when_posted, 
-            user_id,
-            score, 
-            evaluated
+    try:
+        # Create Query
+        # Grabs 'amount' number of ordered central nodes within time frame, then grabs ...
+        # ... their post information, then grabs corresponding user info
+        sql = '''
+        SELECT 
+            post.id as id, 
+            post.image_url, 
+            post.post_url, 
+            post.reposts, 
+            post.replies, 
+            post.likes, 
+            post.when_posted, 
+            post.score, 
+            post.evaluated,
+            username,
+            platform
         FROM
-            mews_app.Posts,
+            mews_app.Users,
             (SELECT
-                post_id, score, evaluated
+                id, 
+                image_url, 
+                post_url, 
+                reposts, 
+                replies, 
+                likes, 
+                when_posted, 
+                user_id,
+                score, 
+                evaluated
             FROM
-                mews_app.PostCentrality
+                mews_app.Posts,
+                (SELECT
+                    post_id, score, evaluated
+                FROM
+                    mews_app.PostCentrality
+                WHERE
+                    evaluated BETWEEN %(lower_dt)s AND %(upper_dt)s
+                ORDER BY
+                    score
+                DESC
+                LIMIT
+                    %(amount)s
+                ) AS central
             WHERE
-                evaluated BETWEEN %(lower_dt)s AND %(upper_dt)s
-            ORDER BY
-                score
-            DESC
-            LIMIT
-                %(amount)s
-            ) AS central
+                central.post_id = id
+            ) AS post
         WHERE
-            central.post_id = id
-        ) AS post
-    WHERE
-        post.user_id = id
-    ;
-    '''
+            post.user_id = id
+        ;
+        '''
 
-    # Create Query Args
-    args = {
-        'lower_dt': lower_dt,
-        'upper_dt': upper_dt,
-        'amount': amount
-    }
-    
-    # Perform Query
-    cursor.execute(sql, args)
+        # Create Query Args
+        args = {
+            'lower_dt': lower_dt,
+            'upper_dt': upper_dt,
+            'amount': amount
+        }
+
+        # Perform Query
+        cursor.execute(sql, args)
+        centralPosts = formatCentral(cursor.fetchall())
 
+        return centralPosts, 200
+    finally:
+        # Clean Up
+        cnx.close()
+
+
+def formatCentral(rows):
     # Extract Information
     centralPosts = []
-    for post in cursor.fetchall():
+    for post in rows:
         post['image_url'] = Images.getImageURL(post['id']),
         post['heatmap_url'] = Images.getHeatmapURL(post['id'])
         centralPosts.append(post)
-
-    cnx.close()
-
-    return centralPosts, 200
+    return centralPosts
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+'''
+' @file   Profiling.py
+' @desc   Profiles single API requests on demand, for admins holding MEWS_PROFILE_TOKEN.
+' @notes  A request sending the token in the X-Mews-Profile header (or the _profile query ...
+'         ... parameter) runs under cProfile; stats are dumped as .pstats to MEWS_PROFILE_DIR ...
+'         ... and the file name is returned in the X-Mews-Profile response header.
+'         Without MEWS_PROFILE_TOKEN no hook is registered, so normal requests pay nothing.
+'''
+
+### Imports
+
+from datetime import datetime
+from flask import g, request
+import cProfile
+import hmac
+import os
+import re
+
+
+### Constants
+
+PROFILE_TOKEN = os.environ.get('MEWS_PROFILE_TOKEN')
+PROFILE_DIR = os.environ.get('MEWS_PROFILE_DIR', '/data/mews/log/profiles')
+HEADER = 'X-Mews-Profile'
+
+
+### Functions
+
+def requested():
+    token = request.headers.get(HEADER) or request.args.get('_profile')
+    return token is not None and hmac.compare_digest(token.encode(), PROFILE_TOKEN.encode())
+
+
+def beforeRequest():
+    if requested():
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+
+def afterRequest(response):
+    profiler = g.pop('profiler', None)
+    if profiler is None:
+        return response
+    profiler.disable()
+
+    # One File per Profiled Request, Named After Route and Time
+    route = request.url_rule.rule if request.url_rule is not None else request.path
+    name = re.sub(r'[^A-Za-z0-9]+', '_', route).strip('_') or 'root'
+    filename = f'{datetime.now().strftime("%Y%m%dT%H%M%S_%f")}_{name}.pstats'
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        profiler.dump_stats(os.path.join(PROFILE_DIR, filename))
+        response.headers[HEADER] = filename
+    except OSError as ex:
+        response.headers[HEADER] = f'error: {ex.strerror}'
+    return response
+
+
+def register(app):
+    '''
+    @desc   Adds the profiling hooks to app if MEWS_PROFILE_TOKEN is set
+    '''
+    if not PROFILE_TOKEN:
+        return
+    app.before_request(beforeRequest)
+    app.after_request(afterRequest)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+
+'''
+' @file   RunReport.py
+' @desc   Machine-readable report of one pipeline stage run: time per phase, rows, peak RSS.
+' @notes  Reports are written as one JSON file per run to MEWS_RUN_REPORTS ...
+'         ... (default /data/mews/log/runs); compareRuns.py reads them back.
+'''
+
+### Imports
+
+from contextlib import contextmanager
+from collections import defaultdict
+from datetime import datetime
+import resource
+import json
+import time
+import sys
+import os
+
+
+### Constants
+
+REPORT_FOLDER = os.environ.get('MEWS_RUN_REPORTS', '/data/mews/log/runs')
+
+
+### Classes
+
+class RunReport:
+    '''
+    @desc   Accumulates phase timings and row counts of a stage run
+    '''
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.started = datetime.now()
+        self.phases = defaultdict(float)
+        self.counts = defaultdict(int)
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name):
+        '''
+        @desc   Adds the time spent in the block to phase name (phases may be entered repeatedly)
+        '''
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] += time.perf_counter() - start
+
+    def add(self, name, seconds):
+        self.phases[name] += seconds
+
+    def count(self, name, amount=1):
+        self.counts[name] += amount
+
+    def toDict(self, status='ok'):
+        wall = time.perf_counter() - self._start
+        rows_out = self.counts.get('rows_out', 0)
+        return {
+            'stage': self.stage,
+            'status': status,
+            'started': self.started.isoformat(),
+            'wall_s': round(wall, 3),
+            'phases_s': {name: round(seconds, 3) for name, seconds in self.phases.items()},
+            'counts': dict(self.counts),
+            'rows_per_s': round(rows_out / wall, 2) if wall > 0 else None,
+            # ru_maxrss Is Kilobytes on Linux
+            'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            'argv': sys.argv[1:]
+        }
+
+    def save(self, status='ok', folder=None):
+        '''
+        @desc    Writes the report, never failing the stage over it
+        @return  path of the report, or None
+        '''
+        folder = folder or REPORT_FOLDER
+        path = os.path.join(folder, f'{self.stage}_{self.started.strftime("%Y%m%dT%H%M%S")}.json')
+        try:
+            os.makedirs(folder, exist_ok=True)
+            with open(path, 'w') as f:
+                json.dump(self.toDict(status), f, indent=2)
+        except OSError as ex:
+            print(f'Could not write run report: {ex}', file=sys.stderr)
+            return None
+        return path
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+
+'''
+' @file   SearchIndex.py
+' @desc   In-memory prefix index over hashtag values and usernames, for autocomplete and the ...
+'         ... hashtag=/user= filters of /posts/trending.
+' @notes  Each kind is a pair of parallel lists sorted by lowercased key, so a prefix is one ...
+'         ... bisect range and an exact name one bisect lookup.
+'         The index is rebuilt from Hashtags and Users when the DataVersion version changes, ...
+'         ... i.e. after syncPosts.py commits. One thread rebuilds; the others keep serving the ...
+'         ... previous index meanwhile.
+'         All functions expect a dictionary cursor.
+'''
+
+### Imports
+
+from bisect import bisect_left
+import mysql.connector
+import threading
+from . import Connection, DataVersion
+
+
+### Constants
+
+KINDS = ('hashtag', 'user')
+MAX_LIMIT = 50
+
+# Prefix Ranges End Below This Key
+END = '\U0010ffff'
+
+
+### Globals
+
+LOCK = threading.Lock()
+BUILD_LOCK = threading.Lock()
+INDEX = {'version': None, 'hashtag': None, 'user': None}
+
+
+### Functions
+
+def normalize(kind, name):
+    return name.strip().lstrip('#' if kind == 'hashtag' else '@').lower()
+
+
+def build(cursor):
+    '''
+    @desc    Reads every hashtag and user into sorted key/entry lists
+    @return  dict of kind to (keys, entries)
+    '''
+    cursor.execute('SELECT id, value FROM mews_app.Hashtags;')
+    hashtags = [{'id': row['id'], 'value': row['value']} for row in cursor.fetchall()]
+
+    cursor.execute('SELECT id, platform, username FROM mews_app.Users;')
+    users = [{'id': row['id'], 'platform': row['platform'], 'username': row['username']} for row in cursor.fetchall()]
+
+    return {
+        'hashtag': sortedByKey(hashtags, 'value'),
+        'user': sortedByKey(users, 'username')
+    }
+
+
+def sortedByKey(entries, name):
+    entries.sort(key=lambda entry: (entry[name].lower(), entry['id']))
+    return [entry[name].lower() for entry in entries], entries
+
+
+def current(cursor=None):
+    '''
+    @desc    Returns the index, rebuilding it first if the data version moved on
+    --
+    @param   cursor  cursor to read with, if the caller already holds a connection
+    @return  dict of kind to (keys, entries)
+    '''
+    global INDEX
+
+    version = DataVersion.current(cursor)
+    with LOCK:
+        index = INDEX
+    if index['hashtag'] is not None and (version is None or version == index['version']):
+        return index
+
+    # Serve the Old Index While Another Thread Rebuilds
+    if not BUILD_LOCK.acquire(blocking=index['hashtag'] is None):
+        return index
+    try:
+        with LOCK:
+            index = INDEX
+        if index['hashtag'] is not None and (version is None or version == index['version']):
+            return index
+
+        if cursor is not None:
+            kinds = build(cursor)
+        else:
+            cnx = Connection.connect()
+            try:
+                kinds = build(cnx.cursor(dictionary=True))
+            finally:
+                cnx.close()
+
+        index = dict(kinds, version=version)
+        with LOCK:
+            INDEX = index
+        return index
+    finally:
+        BUILD_LOCK.release()
+
+
+def prefixRange(keys, prefix):
+    return bisect_left(keys, prefix), bisect_left(keys, prefix + END)
+
+
+def complete(index, kind, prefix, limit):
+    '''
+    @desc    Entries of one kind whose name starts with prefix, in name order
+    '''
+    keys, entries = index[kind]
+    first, last = prefixRange(keys, normalize(kind, prefix))
+    return entries[first:min(last, first + limit)]
+
+
+def ids(index, kind, name):
+    '''
+    @desc    Ids of the hashtag or users (one per platform) named exactly name
+    '''
+    keys, entries = index[kind]
+    key = normalize(kind, name)
+    first = bisect_left(keys, key)
+    last = first
+    while last < len(keys) and keys[last] == key:
+        last += 1
+    return [entry['id'] for entry in entries[first:last]]
+
+
+def autocomplete(prefix, kind, limit):
+    # Check Arguments
+    if prefix is None or not normalize(kind, prefix):
+        return {'error': 'Invalid parameter `q`'}, 400
+    if kind not in KINDS:
+        return {'error': 'Invalid parameter `type`'}, 400
+    if limit < 1:
+        return {'error': 'Invalid parameter `limit`'}, 400
+
+    try:
+        index = current()
+    except mysql.connector.Error as err:
+        return {'error': 'Could not connect to DB'}, 400
+
+    return complete(index, kind, prefix, min(limit, MAX_LIMIT)), 200
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+
+'''
+' @file   SingleFlight.py
+' @desc   Coalesces identical concurrent requests: one (the leader) computes, the others wait and share its result.
+' @notes  Requests are identical if they hit the same route with the same host and query arguments. ...
+'         ... Results are shared as returned, so callers must treat them as read-only.
+'         Coalescing is per process; Metrics.render exposes the leader/follower counts per route.
+'''
+
+### Imports
+
+from collections import defaultdict
+from flask import request
+import threading
+import os
+
+
+### Constants
+
+WAIT_SECONDS = float(os.environ.get('MEWS_SINGLEFLIGHT_WAIT', 30))
+
+
+### Globals
+
+LOCK = threading.Lock()
+CALLS = {}
+COUNTS = defaultdict(lambda: {'leader': 0, 'follower': 0, 'timeout': 0})
+
+
+### Functions
+
+class Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def requestKey():
+    return (request.url_root, request.path, tuple(sorted(request.args.items(multi=True))))
+
+
+def do(name, key, fn):
+    '''
+    @desc    Returns fn(), or the result of an identical call already in flight
+    --
+    @param   name  metric label, e.g. the route
+    @param   key   hashable identity of the call
+    @param   fn    computation to run if no identical call is in flight
+    '''
+    with LOCK:
+        call = CALLS.get((name, key))
+        leader = call is None
+        if leader:
+            call = CALLS[(name, key)] = Call()
+        COUNTS[name]['leader' if leader else 'follower'] += 1
+
+    # Follower: Wait for the Leader, Compute Alone if It Takes Too Long
+    if not leader:
+        if call.done.wait(WAIT_SECONDS):
+            if call.error is not None:
+                raise call.error
+            return call.result
+        with LOCK:
+            COUNTS[name]['timeout'] += 1
+        return fn()
+
+    try:
+        call.result = fn()
+    except BaseException as ex:
+        call.error = ex
+        raise
+    finally:
+        with LOCK:
+            del CALLS[(name, key)]
+        call.done.set()
+    return call.result
+
+
+def coalesce(fn):
+    '''
+    @desc    do() keyed by the current request
+    '''
+    return do(request.url_rule.rule, requestKey(), fn)
+
+
+def counts():
+    with LOCK:
+        return {name: dict(entry) for name, entry in COUNTS.items()}
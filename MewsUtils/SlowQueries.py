@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+
+'''
+' @file   SlowQueries.py
+' @desc   Logs statements slower than a threshold, with their EXPLAIN, to a rotating JSON-lines log.
+' @notes  MEWS_SLOW_QUERY_MS sets the threshold (default 500, negative disables) and ...
+'         ... MEWS_SLOW_QUERY_LOG the log path. reportSlowQueries.py summarizes the log.
+'''
+
+### Imports
+
+from logging.handlers import RotatingFileHandler
+from datetime import datetime
+import mysql.connector
+import traceback
+import threading
+import logging
+import hashlib
+import json
+import time
+import os
+import re
+
+
+### Constants
+
+THRESHOLD_MS = float(os.environ.get('MEWS_SLOW_QUERY_MS', 500))
+LOG_FILEPATH = os.environ.get('MEWS_SLOW_QUERY_LOG', '/data/mews/log/slow_queries.log')
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUPS = 5
+
+
+### Globals
+
+LOCK = threading.Lock()
+LOGGER = None
+
+
+### Functions
+
+def getLogger():
+    '''
+    @desc    Lazily opens the rotating log, or returns None if it cannot be opened
+    '''
+    global LOGGER
+    with LOCK:
+        if LOGGER is None:
+            LOGGER = logging.getLogger('mews.slow_queries')
+            LOGGER.propagate = False
+            LOGGER.setLevel(logging.INFO)
+            try:
+                os.makedirs(os.path.dirname(LOG_FILEPATH) or '.', exist_ok=True)
+                LOGGER.addHandler(RotatingFileHandler(LOG_FILEPATH, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS))
+            except OSError:
+                LOGGER.disabled = True
+        return None if LOGGER.disabled else LOGGER
+
+
+def normalize(sql):
+    '''
+    @desc    Strips literals and whitespace so identical statements share one fingerprint
+    '''
+    sql = re.sub(r'%\(\w+\)s|%s', '?', sql)
+    sql = re.sub(r"'(?:[^'\\]|\\.)*'", '?', sql)
+    sql = re.sub(r'\b\d+(?:\.\d+)?\b', '?', sql)
+    sql = re.sub(r'\(\s*\?(?:\s*,\s*\?)+\s*\)', '(?+)', sql)
+    return re.sub(r'\s+', ' ', sql).strip().rstrip(';').strip()
+
+
+def shape(params):
+    '''
+    @desc    Describes parameters by type (and length) without logging their values
+    '''
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {key: type(value).__name__ for key, value in params.items()}
+    if isinstance(params, (list, tuple)):
+        return [type(value).__name__ for value in params]
+    return type(params).__name__
+
+
+def caller():
+    # First Frame Outside the Instrumentation
+    for frame in reversed(traceback.extract_stack()[:-1]):
+        if os.path.basename(frame.filename) not in ('SlowQueries.py', 'Metrics.py'):
+            return f'{os.path.basename(frame.filename)}:{frame.name}:{frame.lineno}'
+    return None
+
+
+def explain(config, sql, params):
+    '''
+    @desc    Runs EXPLAIN on its own connection, so the caller's unread results are untouched
+    @return  list of plan rows, or an error string
+    '''
+    if not re.match(r'\s*(SELECT|INSERT|REPLACE|UPDATE|DELETE)\b', sql, re.IGNORECASE):
+        return None
+    try:
+        cnx = mysql.connector.connect(**dict(config, raise_on_warnings=False))
+        try:
+            cursor = cnx.cursor(dictionary=True)
+            cursor.execute('EXPLAIN ' + sql, params)
+            plan = cursor.fetchall()
+            cursor.close()
+        finally:
+            cnx.close()
+        return [{key: value if isinstance(value, (int, float, str, type(None))) else str(value) for key, value in row.items()} for row in plan]
+    except mysql.connector.Error as err:
+        return str(err)
+
+
+def check(config, sql, params, seconds, many=False):
+    '''
+    @desc   Logs the statement if it ran longer than THRESHOLD_MS
+    --
+    @param  config   mysql.connector config of the connection it ran on (for EXPLAIN)
+    @param  sql      statement as passed to execute
+    @param  params   parameters as passed to execute
+    @param  seconds  execution time
+    @param  many     True for executemany, whose params is a sequence of rows
+    '''
+    duration_ms = seconds * 1000
+    if THRESHOLD_MS < 0 or duration_ms < THRESHOLD_MS:
+        return
+    logger = getLogger()
+    if logger is None:
+        return
+
+    normalized = normalize(sql)
+    entry = {
+        'when': datetime.now().isoformat(),
+        'duration_ms': round(duration_ms, 3),
+        'fingerprint': hashlib.md5(normalized.encode()).hexdigest()[:16],
+        'sql': normalized,
+        'params': {'rows': len(params), 'row': shape(params[0]) if params else None} if many else shape(params),
+        'caller': caller(),
+        'explain': None if many else explain(config, sql, params)
+    }
+    logger.info(json.dumps(entry, default=str))
+
+
+class TracedCursor:
+    '''
+    @desc   Cursor proxy passing the duration of every statement to check
+    '''
+
+    def __init__(self, cursor, config):
+        self._cursor = cursor
+        self._config = config
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        start = time.perf_counter()
+        result = self._cursor.execute(operation, params, *args, **kwargs)
+        check(self._config, operation, params, time.perf_counter() - start)
+        return result
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        start = time.perf_counter()
+        result = self._cursor.executemany(operation, seq_params, *args, **kwargs)
+        check(self._config, operation, seq_params, time.perf_counter() - start, many=True)
+        return result
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class TracedConnection:
+    '''
+    @desc   Connection proxy handing out TracedCursor
+    '''
+
+    def __init__(self, cnx, config):
+        self._cnx = cnx
+        self._config = config
+
+    def cursor(self, *args, **kwargs):
+        return TracedCursor(self._cnx.cursor(*args, **kwargs), self._config)
+
+    def __getattr__(self, name):
+        return getattr(self._cnx, name)
+
+
+def connect(**config):
+    '''
+    @desc    mysql.connector.connect for scripts, with slow statements logged
+    @return  TracedConnection
+    '''
+    return TracedConnection(mysql.connector.connect(**config), config)
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+
+'''
+' @file   Streaming.py
+' @desc   Graph responses as a stream of ('node' | 'link' | 'error', data) items, ...
+'         ... either collected into {'nodes': [...], 'links': [...]} or written out as NDJSON.
+'''
+
+### Imports
+
+from flask import json, request
+
+
+### Constants
+
+MIMETYPE = 'application/x-ndjson'
+
+
+### Functions
+
+def requested():
+    '''
+    @desc    True if the client asked for NDJSON (?stream=ndjson or Accept: application/x-ndjson)
+    '''
+    return request.args.get('stream', type=str) == 'ndjson' or request.accept_mimetypes.best == MIMETYPE
+
+
+def collect(items):
+    '''
+    @desc    Builds the usual graph dict from items
+    @return  (graph, 200), or (error, code) at the first error item
+    '''
+    out = {'nodes': [], 'links': []}
+    for kind, data in items:
+        if kind == 'node':
+            out['nodes'].append(data)
+        elif kind == 'link':
+            out['links'].append(data)
+        else:
+            body, code = data
+            return body, code
+    return out, 200
+
+
+def ndjson(items):
+    '''
+    @desc    Yields one JSON line per item, tagged with its type; stops after an error item
+    '''
+    for kind, data in items:
+        if kind == 'error':
+            body, code = data
+            yield json.dumps(dict(body, type='error', status=code)) + '\n'
+            return
+        yield json.dumps(dict(data, type=kind)) + '\n'
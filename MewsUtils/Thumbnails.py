@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+
+'''
+' @file   Thumbnails.py
+' @desc   Downscaled JPEG derivatives of post images and heatmaps, generated once into an on-disk cache.
+' @notes  A derivative is named by a hash of its source (path, size in bytes, mtime) and width, so a ...
+'         ... replaced source gets a new entry without reading the original on every request.
+'         Requested widths round up to one of SIZES to bound the number of variants per image.
+'         Hits touch the file's mtime; when the cache grows past MEWS_IMAGE_CACHE_MB the least ...
+'         ... recently used files are evicted (checked every EVICT_EVERY writes).
+'''
+
+### Imports
+
+from PIL import Image
+import threading
+import tempfile
+import hashlib
+import os
+
+
+### Constants
+
+CACHE_FOLDER = os.environ.get('MEWS_IMAGE_CACHE', '/data/mews/image_cache')
+CACHE_MAX_MB = float(os.environ.get('MEWS_IMAGE_CACHE_MB', 2048))
+PREGENERATE_SIZES = [int(size) for size in os.environ.get('MEWS_IMAGE_PREGENERATE', '').split(',') if size.strip()]
+
+SIZES = (40, 80, 160, 320, 640, 1280)
+QUALITY = 85
+EVICT_EVERY = 100
+
+
+### Globals
+
+LOCK = threading.Lock()
+WRITES = 0
+
+
+### Functions
+
+def roundSize(size):
+    '''
+    @desc    Smallest of SIZES at least `size` wide
+    @return  width, or None if the original is no larger than needed
+    '''
+    for width in SIZES:
+        if width >= size:
+            return width
+    return None
+
+
+def cachePath(filepath, width):
+    stat = os.stat(filepath)
+    key = hashlib.sha256(f'{os.path.abspath(filepath)}|{stat.st_size}|{stat.st_mtime_ns}|{width}'.encode()).hexdigest()
+    return os.path.join(CACHE_FOLDER, key[:2], f'{key}.jpg')
+
+
+def generate(filepath, width, path):
+    # Decode at Reduced Scale Where JPEG Allows, Then Resample
+    with Image.open(filepath) as image:
+        image.draft('RGB', (width, width))
+        image = image.convert('RGB')
+        image.thumbnail((width, width), Image.LANCZOS)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                image.save(f, 'JPEG', quality=QUALITY, optimize=True)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+def derivative(filepath, size):
+    '''
+    @desc    Returns the path of filepath downscaled to fit size x size, generating it if needed
+    --
+    @param   filepath  source image
+    @param   size      requested width/height in pixels
+    @return  path of the cached JPEG, or filepath itself for sizes beyond SIZES
+    '''
+    global WRITES
+
+    width = roundSize(size)
+    if width is None:
+        return filepath
+
+    path = cachePath(filepath, width)
+    try:
+        os.utime(path)
+        return path
+    except FileNotFoundError:
+        pass
+
+    generate(filepath, width, path)
+    with LOCK:
+        WRITES += 1
+        evict_now = WRITES % EVICT_EVERY == 0
+    if evict_now:
+        evict()
+    return path
+
+
+def evict(max_mb=None):
+    '''
+    @desc    Deletes least recently used derivatives until the cache fits in max_mb
+    @return  number of files deleted
+    '''
+    max_bytes = (max_mb if max_mb is not None else CACHE_MAX_MB) * 1024 * 1024
+    entries = []
+    total = 0
+    for root, _, files in os.walk(CACHE_FOLDER):
+        for name in files:
+            try:
+                stat = os.stat(os.path.join(root, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, os.path.join(root, name)))
+            total += stat.st_size
+
+    deleted = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        deleted += 1
+    return deleted
+
+
+def pregenerate(filepath, sizes=None):
+    '''
+    @desc    Generates the derivatives of one image ahead of requests (see syncPosts.py)
+    '''
+    for size in (sizes if sizes is not None else PREGENERATE_SIZES):
+        derivative(filepath, size)
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+'''
+' @file   TopNeighbors.py
+' @desc   Per-post lists of the TOP_K heaviest neighbors, kept in PostTopNeighbors by syncGraph.py ...
+'         ... so most /posts/<pid>/related pages are served without ranking all of a post's edges.
+' @notes  neighbors holds [[other_id, total_wt], ...] by weight descending. A list shorter than ...
+'         ... TOP_K is every neighbor of the post.
+'         All functions expect a dictionary cursor.
+'''
+
+### Imports
+
+import json
+from .Boxes import chunks
+
+
+### Constants
+
+TOP_K = 20
+
+
+### Functions
+
+def neighborPostIds(cursor):
+    '''
+    @desc    Returns the id of every post with an edge, for a full rebuild
+    '''
+    cursor.execute('SELECT DISTINCT post_id AS id FROM mews_app.PostAdjacency;')
+    return {row['id'] for row in cursor.fetchall()}
+
+
+def refreshTopNeighbors(cursor, post_ids):
+    '''
+    @desc    Recomputes the PostTopNeighbors rows of the given posts from PostAdjacency
+    --
+    @param   cursor    cursor for mysql.connector
+    @param   post_ids  iterable of post id's whose edges changed
+    @return  number of rows written
+    '''
+    written = 0
+    for chunk in chunks(post_ids):
+        neighbors = {pid: [] for pid in chunk}
+
+        # Top K per Post, Read Off the (post_id, total_wt DESC) Index
+        sql = f'''
+        SELECT post_id, other_id, total_wt
+        FROM (
+            SELECT
+                post_id, other_id, total_wt,
+                ROW_NUMBER() OVER (PARTITION BY post_id ORDER BY total_wt DESC) AS position
+            FROM mews_app.PostAdjacency
+            WHERE post_id IN ({','.join(['%s'] * len(chunk))})
+        ) AS ranked
+        WHERE position <= %s
+        ORDER BY post_id, position
+        ;
+        '''
+        cursor.execute(sql, chunk + [TOP_K])
+        for row in cursor.fetchall():
+            neighbors[row['post_id']].append([row['other_id'], row['total_wt']])
+
+        sql = '''
+        REPLACE INTO mews_app.PostTopNeighbors (post_id, neighbors)
+        VALUES (%s, %s)
+        ;
+        '''
+        cursor.executemany(sql, [(pid, json.dumps(neighbors[pid])) for pid in chunk])
+        written += len(chunk)
+
+    return written
+
+
+def loadTopNeighbors(cursor, pid):
+    '''
+    @desc    Reads the top neighbors of a post
+    @return  list of [other_id, total_wt], or None if the post has no row yet
+    '''
+    sql = '''
+    SELECT neighbors FROM mews_app.PostTopNeighbors WHERE post_id = %(pid)s
+    ;
+    '''
+    cursor.execute(sql, {'pid': pid})
+    row = cursor.fetchone()
+    return json.loads(row['neighbors']) if row is not None else None
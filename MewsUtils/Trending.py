@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+
+'''
+' @file   Trending.py
+' @desc   Ranked trending lists precomputed by snapshotTrending.py, paged by /posts/trending ...
+'         ... instead of re-ranking the window on every request.
+' @notes  A snapshot holds the SIZE best posts of the WINDOWS-day window ending when it was taken. ...
+'         ... Every score drops by one per day (the DATEDIFF term), so the order stays valid and ...
+'         ... served scores are shifted by the days since the snapshot.
+'         A request window inside a snapshot's window is served by filtering the list on ...
+'         ... when_posted. Any post left out of a full list scores below all of it, so a page is ...
+'         ... exact if the list fills it; otherwise the caller falls back to the full query.
+'         Posts synced after a snapshot are not listed until the next one; cron.sh takes it right ...
+'         ... after syncPosts.py.
+'         All functions expect a dictionary cursor.
+'''
+
+### Imports
+
+from datetime import datetime, timedelta
+
+
+### Constants
+
+TRENDING_EQUATION = '(LOG(reposts + 1) + LOG(replies + 1) + LOG(likes + 1) / 2 - DATEDIFF(CURDATE(), when_posted))'
+WINDOWS = (7, 30)
+SIZE = 1000
+MAX_AGE = timedelta(days=2)
+
+
+### Functions
+
+def snapshot(cursor, now=None):
+    '''
+    @desc    Replaces the snapshot of every standard window
+    --
+    @param   cursor  cursor for mysql.connector
+    @param   now     end of the windows (default now)
+    @return  dict of window days to number of posts stored
+    '''
+    now = now or datetime.now()
+    counts = {}
+    for days in WINDOWS:
+        lower_dt = now - timedelta(days=days)
+
+        cursor.execute('DELETE FROM mews_app.TrendingSnapshots WHERE window_days = %(days)s;', {'days': days})
+
+        sql = f'''
+        INSERT INTO mews_app.TrendingSnapshots (window_days, position, post_id, score, when_posted)
+        SELECT
+            %(days)s,
+            ROW_NUMBER() OVER (ORDER BY score DESC, id),
+            id,
+            score,
+            when_posted
+        FROM (
+            SELECT
+                Posts.id as id,
+                when_posted,
+                {TRENDING_EQUATION} as score
+            FROM
+                mews_app.Posts,
+                mews_app.Users
+            WHERE
+                when_posted BETWEEN %(lower_dt)s AND %(upper_dt)s
+                AND
+                Posts.user_id = Users.id
+            ORDER BY
+                score DESC, id
+            LIMIT
+                %(size)s
+        ) AS ranked
+        ;
+        '''
+        cursor.execute(sql, {'days': days, 'lower_dt': lower_dt, 'upper_dt': now, 'size': SIZE})
+        counts[days] = cursor.rowcount
+
+        sql = '''
+        REPLACE INTO mews_app.TrendingSnapshotRuns (window_days, lower_dt, upper_dt, computed, size)
+        VALUES (%(days)s, %(lower_dt)s, %(upper_dt)s, NOW(), %(size)s)
+        ;
+        '''
+        cursor.execute(sql, {'days': days, 'lower_dt': lower_dt, 'upper_dt': now, 'size': counts[days]})
+
+    return counts
+
+
+def page(cursor, lower_dt, upper_dt, skip, amount):
+    '''
+    @desc    Pages the trending posts of [lower_dt, upper_dt] out of the smallest covering snapshot
+    @return  list of (post_id, score), or None if no fresh snapshot covers the page
+    '''
+    sql = '''
+    SELECT
+        window_days, lower_dt, size
+    FROM
+        mews_app.TrendingSnapshotRuns
+    WHERE
+        lower_dt <= %(lower_dt)s
+        AND
+        computed >= %(fresh)s
+    ORDER BY
+        window_days
+    LIMIT 1
+    ;
+    '''
+    cursor.execute(sql, {'lower_dt': lower_dt, 'fresh': datetime.now() - MAX_AGE})
+    run = cursor.fetchone()
+    if run is None:
+        return None
+
+    sql = '''
+    SELECT
+        Snapshots.post_id as post_id,
+        Snapshots.score - DATEDIFF(CURDATE(), Runs.computed) as score
+    FROM
+        mews_app.TrendingSnapshots AS Snapshots,
+        mews_app.TrendingSnapshotRuns AS Runs
+    WHERE
+        Snapshots.window_days = %(days)s
+        AND
+        Runs.window_days = Snapshots.window_days
+        AND
+        Snapshots.when_posted BETWEEN %(lower_dt)s AND %(upper_dt)s
+    ORDER BY
+        Snapshots.position
+    LIMIT
+        %(skip)s, %(amount)s
+    ;
+    '''
+    cursor.execute(sql, {'days': run['window_days'], 'lower_dt': lower_dt, 'upper_dt': upper_dt, 'skip': skip, 'amount': amount})
+    rows = [(row['post_id'], row['score']) for row in cursor.fetchall()]
+
+    # A Short Page From a Truncated List May Be Missing Posts
+    if len(rows) < amount and run['size'] >= SIZE:
+        return None
+    return rows
@@ -2,13 +2,14 @@
 
 ### Imports
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from datetime import datetime, timedelta, date
+import dateutil.parser as dt
 import mysql.connector
 import json
 import os
 from flask_cors import CORS, cross_origin
-from MewsUtils import Posts, Graph, Clusters, Images
+from MewsUtils import Posts, Graph, GraphIndex, Clusters, DataVersion, Images, Metrics, Profiling, SearchIndex, SingleFlight, Streaming
 
 
 ### Globals
@@ -17,6 +18,51 @@ app = Flask(__name__)
 os.environ['FLASK_ENV'] = 'development'
 cors = CORS(app)
 app.config['CORS_HEADERS'] = 'Content-Type'
+WINDOW_BUCKET = timedelta(seconds=float(os.environ.get('MEWS_WINDOW_BUCKET_S', 60)))
+if WINDOW_BUCKET < timedelta(0):
+    raise ValueError('MEWS_WINDOW_BUCKET_S must be >= 0 (0 turns bucketing off)')
+Metrics.register(app)
+Profiling.register(app)
+GraphIndex.register(app)
+DataVersion.register(app, lambda: timeWindow())
+
+
+### Helpers
+
+def bucket(when, up=False):
+    # Floor (or Ceil) to a Multiple of WINDOW_BUCKET Since Midnight
+    if not WINDOW_BUCKET:
+        return when
+    midnight = when.replace(hour=0, minute=0, second=0, microsecond=0)
+    offset = (when - midnight) % WINDOW_BUCKET
+    if offset and up:
+        return when - offset + WINDOW_BUCKET
+    return when - offset
+
+def timeWindow():
+    """
+    @desc    Reads `upper`/`lower` (default: the 30 days up to now), widened to WINDOW_BUCKET ...
+             ... boundaries so requests within a bucket are identical and cacheable
+    @return  upper, lower as strings; unparsable values are passed on for the callee to reject
+    """
+    upper = request.args.get('upper', type=str, default=None)
+    lower = request.args.get('lower', type=str, default=None)
+    now = datetime.now()
+    try:
+        upper = str(bucket(dt.parse(upper) if upper is not None else now, up=True))
+    except (ValueError, OverflowError):
+        pass
+
+    # Default Stays 30 Days Before Now, Even if Only `upper` Is Given
+    try:
+        lower = str(bucket(dt.parse(lower) if lower is not None else now - timedelta(days=30)))
+    except (ValueError, OverflowError):
+        pass
+    return upper, lower
+
+def streamItems(items):
+    # One JSON Object per Line, Written as the Items Are Produced
+    return Response(stream_with_context(Streaming.ndjson(items)), mimetype=Streaming.MIMETYPE)
 
 
 ### API Routes
@@ -33,39 +79,102 @@ def getTrending():
     @param   upper  - upper bound for when_posted (datetime syntax)
     @param   getBoxes  - bool to get bounding boxes or not (takes longer to get boxes, so false by default)
     @param   search - search term with which to filter posts
+    @param   fields - comma separated fields to return (default all; id is always returned)
+    @param   hashtag - only posts with this hashtag (exact, case-insensitive)
+    @param   user   - only posts by this username (exact, case-insensitive)
     --
     @return  list of trending posts
     """
 
     # Get Request Arguments
-    upper = request.args.get('upper', type=str, default = str(datetime.now()))
-    lower = request.args.get('lower', type=str, default = str(datetime.now() - timedelta(days=30)))
+    upper, lower = timeWindow()
     skip = request.args.get('skip', type=int, default=0)
     amount = request.args.get('amount', type=int, default=10)
     getBoxes = request.args.get('getBoxes', type=bool, default=False)
     searchTerm = request.args.get('search', type=str, default=None)
+    fields = request.args.get('fields', type=str, default=None)
+    hashtag = request.args.get('hashtag', type=str, default=None)
+    user = request.args.get('user', type=str, default=None)
 
     # Call Internal Function
-    trendPosts, code = Posts.getTrendingPosts(upper, lower, skip, amount, getBoxes, searchTerm)
+    trendPosts, code = Posts.getTrendingPosts(upper, lower, skip, amount, getBoxes, searchTerm, fields, hashtag, user)
 
     return jsonify(trendPosts), code
 
 
+@app.route('/search/autocomplete', methods=['GET'])
+def getAutocomplete():
+    """
+    @route   GET /search/autocomplete
+    @desc    Returns the hashtags or users whose name starts with a prefix, in name order
+    --
+    @param   q     - prefix to complete (a leading # or @ is ignored)
+    @param   type  - hashtag or user (default hashtag)
+    @param   limit - maximum number of results (int, at most 50)
+    --
+    @return  list of hashtags ({id, value}) or users ({id, platform, username})
+    """
+
+    # Get Request Arguments
+    prefix = request.args.get('q', type=str, default=None)
+    kind = request.args.get('type', type=str, default='hashtag')
+    limit = request.args.get('limit', type=int, default=10)
+
+    # Call Internal Function
+    matches, code = SearchIndex.autocomplete(prefix, kind, limit)
+
+    return jsonify(matches), code
+
+
 @app.route('/posts/<pid>', methods=['GET'])
 def getPost(pid):
     """
     @route   GET /posts/<pid>
     @desc    Returns the specified post
     --
+    @param   fields - comma separated fields to return (default all; id is always returned)
+    --
     @return  post
     """
 
+    # Get Request Arguments
+    fields = request.args.get('fields', type=str, default=None)
+
     # Call Internal Function
-    post, code = Posts.getPost(pid)
+    post, code = Posts.getPost(pid, fields)
  
     return jsonify(post), code
 
 
+@app.route('/posts', methods=['GET'])
+@app.route('/posts/batch', methods=['POST'])
+def getPosts():
+    """
+    @route   GET /posts?ids=1,2,3  or  POST /posts/batch {"ids": [1, 2, 3]}
+    @desc    Returns many posts (with boxes) in one lookup
+    --
+    @param   ids - post ids, comma separated (GET) or a JSON list (POST)
+    --
+    @return  one item per requested id: {id, found, post} or {id, found, error}
+    """
+
+    # Get Request Arguments
+    if request.method == 'POST':
+        body = request.get_json(silent=True)
+        if isinstance(body, dict):
+            pids = body.get('ids')
+        else:
+            # Anything but a List Is Rejected by Posts.getPosts
+            pids = body
+    else:
+        pids = [pid for pid in request.args.get('ids', type=str, default='').split(',') if pid != '']
+
+    # Call Internal Function
+    posts, code = Posts.getPosts(pids)
+
+    return jsonify(posts), code
+
+
 @app.route('/posts/<pid>/related', methods=['GET'])
 def getRelatedPosts(pid):
     """
@@ -74,6 +183,7 @@ def getRelatedPosts(pid):
     --
     @param   skip   - number of posts to skip (int)
     @param   amount - number of posts to return (int)
+    @param   fields - comma separated fields to return (default all; id is always returned)
     --
     @return  list of related posts
     """
@@ -81,9 +191,10 @@ def getRelatedPosts(pid):
     # Grab Request Arguments
     skip = request.args.get('skip', type=int, default=0)
     amount = request.args.get('amount', type=int, default=3)
+    fields = request.args.get('fields', type=str, default=None)
 
     # Call Internal Function
-    posts, code = Posts.getRelatedPosts(pid, skip, amount)
+    posts, code = Posts.getRelatedPosts(pid, skip, amount, fields)
 
     return jsonify(posts), code
 
@@ -103,8 +214,7 @@ def getCentralPosts():
     """
 
     # Get Request Arguments
-    upper = request.args.get('upper', type=str, default = str(datetime.now()))
-    lower = request.args.get('lower', type=str, default = str(datetime.now() - timedelta(days=30)))
+    upper, lower = timeWindow()
     skip = request.args.get('skip', type=int, default=0)
     amount = request.args.get('amount', type=int, default=3)
 
@@ -125,19 +235,28 @@ def getCentralGraph():
     @param   rel_amount     - number of related posts per central post to return (int)
     @param   lower          - lower bound for when_posted (datetime syntax)
     @param   upper          - upper bound for when_posted (datetime syntax)
+    @param   fields         - comma separated fields of related posts (default all; id is always returned)
+    @param   stream         - 'ndjson' to stream one node/link per line (or Accept: application/x-ndjson)
     --
     @return  list of central posts and related posts with links
     """
 
     # Get Request Arguments
-    upper = request.args.get('upper', type=str, default = str(datetime.now()))
-    lower = request.args.get('lower', type=str, default = str(datetime.now() - timedelta(days=30)))
+    upper, lower = timeWindow()
     skip = request.args.get('skip', type=int, default=0)
     central_amount = request.args.get('central_amount', type=int, default=10)
     rel_amount = request.args.get('rel_amount', type=int, default=10)
+    fields = request.args.get('fields', type=str, default=None)
 
-    # Call Function
-    graph, code = Graph.getCentralGraph(upper, lower, skip, central_amount, rel_amount)
+    # Stream Nodes and Links if Asked
+    if Streaming.requested():
+        items, code = Graph.iterCentralGraph(upper, lower, skip, central_amount, rel_amount, fields)
+        if code != 200:
+            return jsonify(items), code
+        return streamItems(items)
+
+    # Call Function, Sharing the Result With Identical Concurrent Requests
+    graph, code = SingleFlight.coalesce(lambda: Graph.getCentralGraph(upper, lower, skip, central_amount, rel_amount, fields))
 
     return jsonify(graph), code
 
@@ -147,21 +266,34 @@ def getClusters(cid):
     # Request Params
     amount = request.args.get('amount', type=int, default=10)
 
+    if Streaming.requested():
+        return streamItems(Clusters.iterClusters(cid, amount))
+
     return Clusters.getClusters(cid, amount)
 
 @app.route('/clusters/daily', methods=['GET'])
 def getDailyClusters():
     amount = request.args.get('amount', type=int, default=10)
     day = request.args.get('day', type=str, default=date.today().strftime('%Y-%m-%d'))
-    return Clusters.getDailyClusters(day, amount)
+
+    if Streaming.requested():
+        return streamItems(Clusters.iterDailyClusters(day, amount))
+
+    # Share the Result With Identical Concurrent Requests
+    clusters, code = SingleFlight.coalesce(lambda: Clusters.dailyClusters(day, amount))
+
+    return jsonify(clusters), code
 
 @app.route('/posts/<pid>/image', methods=['GET'])
 def getPostImage(pid):
-    return Images.getPostImage(pid)
+    # Optional Downscaling to Fit size x size (w= Also Accepted)
+    size = request.args.get('size', type=int, default=request.args.get('w', type=int))
+    return Images.getPostImage(pid, size)
 
 @app.route('/posts/<pid>/heatmap', methods=['GET'])
 def getPostHeatmap(pid):
-    return Images.getPostHeatmap(pid)
+    size = request.args.get('size', type=int, default=request.args.get('w', type=int))
+    return Images.getPostHeatmap(pid, size)
 
 ### Main Execution
 
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+
+'''
+' @file   clustering.py
+' @desc   Measures how the clustering and centrality stages of clusterPosts.py scale, without a database.
+' @notes  Graphs have planted communities with power-law sizes and power-law degrees; a fraction ...
+'         ... (mu) of each node's edges leave its community, with lower weights.
+'         Nodes are spread over DAYS + 1 days. Every engine clusters the window of the last DAYS ...
+'         ... days; lpa-warm first clusters the window a day earlier (untimed) and slides it ...
+'         ... forward like clusterPosts.py --incremental. Time and memory cover only the ...
+'         ... clustering of the last window.
+'''
+
+### Imports
+
+from networkx.algorithms import community
+from datetime import datetime
+import networkx as nx
+import tracemalloc
+import random
+import time
+import json
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import clusterPosts
+
+
+### Constants
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+DAYS = 7
+
+
+### Functions
+
+def usage(code):
+    print(f'''Usage: {os.path.basename(sys.argv[0])} [-h] [--sizes N,N,...] [--engines E,E,...] [--mu MU] [--degree D] [--seed S] [-o PATH]
+    -h                 Help message
+    --sizes N,...      Node counts of the clustered window (default {','.join(map(str, DEFAULT_SIZES))})
+    --engines E,...    Clustering engines to run: {', '.join(ENGINES)} (default all available)
+    --mu MU            Fraction of edges leaving their community (default 0.2)
+    --degree D         Mean degree (default 8)
+    --seed S           Random seed (default 0)
+    -o PATH            Also write results as JSON to PATH''')
+    sys.exit(code)
+
+
+def powerLaw(rng, minimum, maximum, exponent):
+    # Inverse Transform Sampling of a Bounded Power Law
+    a, b = minimum ** (1 - exponent), maximum ** (1 - exponent)
+    return int((a + (b - a) * rng.random()) ** (1 / (1 - exponent)))
+
+
+def syntheticGraph(size, mu=0.2, mean_degree=8, seed=0):
+    '''
+    @desc    Weighted graph with planted communities, each node posted on a day in [0, DAYS]
+    --
+    @param   size         number of nodes
+    @param   mu           fraction of each node's edges to other communities
+    @param   mean_degree  approximate mean degree
+    @param   seed         random seed
+    @return  graph        networkx graph with 'weight' on edges and 'day' on nodes
+    @return  planted      list of sets of nodes
+    '''
+    rng = random.Random(seed)
+
+    # Community Sizes ~ Power Law (Exponent 2)
+    planted = []
+    node = 0
+    while node < size:
+        members = min(size - node, powerLaw(rng, 5, max(6, size // 20), 2))
+        planted.append(set(range(node, node + members)))
+        node += members
+    community_of = {n: i for i, members in enumerate(planted) for n in members}
+    members_of = [list(members) for members in planted]
+
+    # Degrees ~ Power Law (Exponent 2.5), Scaled to the Mean
+    degrees = [powerLaw(rng, 1, max(2, size // 10), 2.5) for _ in range(size)]
+    scale = mean_degree / (sum(degrees) / size)
+    degrees = [max(1, int(d * scale)) for d in degrees]
+
+    graph = nx.Graph()
+    graph.add_nodes_from((n, {'day': rng.randrange(DAYS + 1)}) for n in range(size))
+    for n, degree in enumerate(degrees):
+        # Each Node Adds Half Its Stubs, Its Neighbors Add the Rest
+        for _ in range((degree + 1) // 2):
+            if rng.random() < mu:
+                other = rng.randrange(size)
+                weight = rng.random() / 2
+            else:
+                other = rng.choice(members_of[community_of[n]])
+                weight = 0.5 + rng.random()
+            if other != n:
+                graph.add_edge(n, other, weight=weight)
+
+    graph.remove_nodes_from(list(nx.isolates(graph)))
+    planted = [members & set(graph) for members in planted]
+    return graph, [members for members in planted if members]
+
+
+def window(graph, first_day, last_day):
+    # Posts of [first_day, last_day] With At Least One Edge, as clusterPosts.py Loads Them
+    days = graph.nodes(data='day')
+    sub = graph.subgraph(n for n in graph if first_day <= days[n] <= last_day).copy()
+    sub.remove_nodes_from(list(nx.isolates(sub)))
+    return sub
+
+
+def coldSetup(graph):
+    return (window(graph, 1, DAYS),)
+
+
+def warmSetup(graph):
+    # Cluster the Previous Window, Then Slide: the Oldest Day Expires and a New Day Arrives
+    labels = clusterPosts.labels_from_clusters(clusterPosts.generate_clusters(window(graph, 0, DAYS - 1)))
+    return window(graph, 1, DAYS), labels
+
+
+def lpa(graph):
+    return list(clusterPosts.generate_clusters(graph))
+
+
+def lpaWarm(graph, labels):
+    clusters, _ = clusterPosts.generate_clusters_warm(graph, labels)
+    return clusters
+
+
+def louvain(graph):
+    return list(community.louvain_communities(graph, weight='weight', seed=0))
+
+
+# Engine: (Untimed Setup Returning the Run's Arguments, Timed Run)
+ENGINES = {'lpa': (coldSetup, lpa), 'lpa-warm': (warmSetup, lpaWarm)}
+if hasattr(community, 'louvain_communities'):
+    ENGINES['louvain'] = (coldSetup, louvain)
+
+
+def measure(stage, *args):
+    '''
+    @desc    Runs stage(*args) under tracemalloc
+    @return  result, seconds, peak MB of Python allocations
+    '''
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = stage(*args)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak / 1024 / 1024
+
+
+def centralities(graph, clusters):
+    # Same Filter and Centrality as clusterPosts.write_clusters
+    for cluster in clusters:
+        if len(cluster) > 4:
+            clusterPosts.cluster_centralities(graph, cluster)
+
+
+def main():
+    sizes = DEFAULT_SIZES
+    engines = list(ENGINES)
+    mu = 0.2
+    mean_degree = 8
+    seed = 0
+    output_path = None
+
+    args = sys.argv[1:]
+    while len(args):
+        arg = args.pop(0)
+        if arg == '-h':
+            usage(0)
+        elif arg == '--sizes':
+            sizes = [int(size) for size in args.pop(0).split(',')]
+        elif arg == '--engines':
+            engines = args.pop(0).split(',')
+            if any(engine not in ENGINES for engine in engines):
+                usage(1)
+        elif arg == '--mu':
+            mu = float(args.pop(0))
+        elif arg == '--degree':
+            mean_degree = float(args.pop(0))
+        elif arg == '--seed':
+            seed = int(args.pop(0))
+        elif arg == '-o':
+            output_path = args.pop(0)
+        else:
+            usage(1)
+
+    random.seed(seed)
+    results = []
+    print(f'{"nodes":>8} {"edges":>9} {"engine":9} {"clusters":>8} {"cluster s":>10} {"cluster MB":>10} {"central s":>10} {"central MB":>10} {"modularity":>10} {"planted":>8}')
+    for size in sizes:
+        full, planted = syntheticGraph(size * (DAYS + 1) // DAYS, mu, mean_degree, seed)
+        graph = window(full, 1, DAYS)
+        planted = [members & set(graph) for members in planted]
+        planted_modularity = community.modularity(graph, [members for members in planted if members], weight='weight')
+
+        for engine in engines:
+            setup, run = ENGINES[engine]
+            args = setup(full)
+            clusters, cluster_seconds, cluster_mb = measure(run, *args)
+            _, central_seconds, central_mb = measure(centralities, graph, clusters)
+            result = {
+                'nodes': graph.number_of_nodes(),
+                'edges': graph.number_of_edges(),
+                'engine': engine,
+                'clusters': len(clusters),
+                'cluster_s': cluster_seconds,
+                'cluster_mb': cluster_mb,
+                'centrality_s': central_seconds,
+                'centrality_mb': central_mb,
+                'modularity': community.modularity(graph, clusters, weight='weight'),
+                'planted_modularity': planted_modularity
+            }
+            results.append(result)
+            print(f'{result["nodes"]:8} {result["edges"]:9} {engine:9} {result["clusters"]:8} {cluster_seconds:10.2f} {cluster_mb:10.1f} '
+                  f'{central_seconds:10.2f} {central_mb:10.1f} {result["modularity"]:10.3f} {planted_modularity:8.3f}')
+
+    if output_path is not None:
+        with open(output_path, 'w') as f:
+            json.dump({'when': str(datetime.now()), 'mu': mu, 'mean_degree': mean_degree, 'seed': seed, 'results': results}, f, indent=2)
+
+
+### Main Execution
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+
+'''
+' @file   endpoints.py
+' @desc   Measures latency and query counts of the API against a database seeded by bench/seed.py.
+' @notes  Each endpoint is driven twice: through its MewsUtils function and through its Flask route.
+'''
+
+### Imports
+
+from datetime import datetime, timedelta
+import mysql.connector
+import random
+import math
+import time
+import json
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from MewsUtils import Connection, Posts, Graph, Clusters
+import app as mews
+
+
+### Query Counting
+
+COUNTS = {'connections': 0, 'queries': 0}
+
+
+class CountingCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, *args, **kwargs):
+        COUNTS['queries'] += 1
+        return self._cursor.execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        COUNTS['queries'] += 1
+        return self._cursor.executemany(*args, **kwargs)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class CountingConnection:
+    def __init__(self, cnx):
+        self._cnx = cnx
+
+    def cursor(self, *args, **kwargs):
+        return CountingCursor(self._cnx.cursor(*args, **kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self._cnx, name)
+
+
+def countingConnect(connect):
+    def wrapper(*args, **kwargs):
+        COUNTS['connections'] += 1
+        return CountingConnection(connect(*args, **kwargs))
+    return wrapper
+
+
+### Functions
+
+def usage(code):
+    print(f'''Usage: {os.path.basename(sys.argv[0])} [-h] [-n N] [-w N] [-o PATH] --config PATH [--only NAME]
+    -h             Help message
+    -n N           Measured calls per endpoint (default 50)
+    -w N           Warm-up calls per endpoint (default 5)
+    -o PATH        Also write results as JSON to PATH
+    --config PATH  mysql.connector config of the seeded database (required)
+    --only NAME    Only run endpoints whose name contains NAME''')
+    sys.exit(code)
+
+
+def loadConfig(filepath):
+    with open(filepath) as f:
+        return json.load(f)
+
+
+def percentile(values, p):
+    # Nearest Rank
+    values = sorted(values)
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+
+def sampleInputs(config):
+    '''
+    @desc    Grabs ids and days that exist in the seeded database
+    @return  dict with post ids, related post ids and a clustering day
+    '''
+    cnx = mysql.connector.connect(**config)
+    cursor = cnx.cursor(dictionary=True)
+
+    cursor.execute('SELECT MIN(id) as lo, MAX(id) as hi FROM mews_app.Posts;')
+    bounds = cursor.fetchone()
+    cursor.execute('SELECT MAX(post1_id) as hi FROM mews_app.PostRelatedness;')
+    related_hi = cursor.fetchone()['hi'] or bounds['hi']
+    cursor.execute('SELECT MAX(day) as day, MAX(clustering_id) as clustering_id FROM mews_app.DailyClusterings;')
+    daily = cursor.fetchone()
+
+    cursor.close()
+    cnx.close()
+
+    return {
+        'pids': [random.randint(bounds['lo'], bounds['hi']) for _ in range(1000)],
+        'related_pids': [random.randint(bounds['lo'], related_hi) for _ in range(1000)],
+        'day': daily['day'].strftime('%Y-%m-%d') if daily['day'] else None,
+        'clustering_id': daily['clustering_id']
+    }
+
+
+def scenarios(inputs):
+    '''
+    @desc    Named callables, one call each
+    '''
+    upper = str(datetime.now())
+    lower = str(datetime.now() - timedelta(days=30))
+    client = mews.app.test_client()
+    pid = lambda: random.choice(inputs['pids'])
+    related_pid = lambda: random.choice(inputs['related_pids'])
+
+    return [
+        ('Posts.getTrendingPosts', lambda: Posts.getTrendingPosts(upper, lower, 0, 10, False)),
+        ('Posts.getTrendingPosts+boxes', lambda: Posts.getTrendingPosts(upper, lower, 0, 10, True)),
+        ('Posts.getTrendingPosts+search', lambda: Posts.getTrendingPosts(upper, lower, 0, 10, False, 'fraud')),
+        ('Posts.getPost', lambda: Posts.getPost(pid())),
+        ('Posts.getPosts', lambda: Posts.getPosts([pid() for _ in range(50)])),
+        ('Posts.getRelatedPosts', lambda: Posts.getRelatedPosts(related_pid(), 0, 3)),
+        ('Posts.getCentralPosts', lambda: Posts.getCentralPosts(upper, lower, 0, 10)),
+        ('Graph.getCentralGraph', lambda: Graph.getCentralGraph(upper, lower, 0, 10, 10)),
+        ('Clusters.getClusters', lambda: Clusters.getClusters(inputs['clustering_id'], 10)),
+        ('Clusters.dailyClusters', lambda: Clusters.dailyClusters(inputs['day'], 10)),
+        ('GET /posts/trending', lambda: client.get('/posts/trending')),
+        ('GET /posts/<pid>', lambda: client.get(f'/posts/{pid()}')),
+        ('GET /posts?ids=', lambda: client.get('/posts?ids=' + ','.join(str(pid()) for _ in range(50)))),
+        ('GET /posts/<pid>/related', lambda: client.get(f'/posts/{related_pid()}/related')),
+        ('GET /posts/central', lambda: client.get('/posts/central')),
+        ('GET /graph/central', lambda: client.get('/graph/central')),
+        ('GET /clusters/<cid>', lambda: client.get(f'/clusters/{inputs["clustering_id"]}')),
+        ('GET /clusters/daily', lambda: client.get(f'/clusters/daily?day={inputs["day"]}')),
+    ]
+
+
+def measure(call, iterations, warmup):
+    '''
+    @desc    Times a callable
+    @return  dict of latency percentiles (ms) and mean connections/queries per call
+    '''
+    for _ in range(warmup):
+        call()
+
+    latencies = []
+    COUNTS.update(connections=0, queries=0)
+    for _ in range(iterations):
+        start = time.perf_counter()
+        call()
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    return {
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+        'connections': COUNTS['connections'] / iterations,
+        'queries': COUNTS['queries'] / iterations
+    }
+
+
+def main():
+    iterations = 50
+    warmup = 5
+    output_path = None
+    config_path = None
+    only = None
+
+    args = sys.argv[1:]
+    while len(args):
+        arg = args.pop(0)
+        if arg == '-h':
+            usage(0)
+        elif arg == '-n':
+            iterations = int(args.pop(0))
+        elif arg == '-w':
+            warmup = int(args.pop(0))
+        elif arg == '-o':
+            output_path = args.pop(0)
+        elif arg == '--config':
+            config_path = args.pop(0)
+        elif arg == '--only':
+            only = args.pop(0)
+        else:
+            usage(1)
+
+    # No Default: the App's Own Config Points at Production
+    if config_path is None:
+        usage(1)
+
+    # Point MewsUtils at the Seeded Database, Count What It Does
+    config = loadConfig(config_path)
+    Connection.DB_CONFIG.update(config)
+    inputs = sampleInputs(config)
+    mysql.connector.connect = countingConnect(mysql.connector.connect)
+
+    results = {}
+    print(f'{"endpoint":32} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"conns":>6} {"queries":>8}')
+    with mews.app.test_request_context():
+        for name, call in scenarios(inputs):
+            if only is not None and only not in name:
+                continue
+            result = measure(call, iterations, warmup)
+            results[name] = result
+            print(f'{name:32} {result["p50_ms"]:9.2f} {result["p95_ms"]:9.2f} {result["p99_ms"]:9.2f} {result["connections"]:6.1f} {result["queries"]:8.1f}')
+
+    if output_path is not None:
+        with open(output_path, 'w') as f:
+            json.dump({'when': str(datetime.now()), 'iterations': iterations, 'results': results}, f, indent=2)
+
+
+### Main Execution
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+-- Schema of the benchmark database, reconstructed from the queries in this repo.
+-- Only for a local throwaway server: bench/seed.py drops and recreates these tables.
+
+CREATE DATABASE IF NOT EXISTS `mews_app`;
+
+DROP TABLE IF EXISTS `mews_app`.`Users`;
+CREATE TABLE `mews_app`.`Users` (
+  `id` bigint(20) NOT NULL AUTO_INCREMENT,
+  `platform` varchar(32) NOT NULL,
+  `username` varchar(255) NOT NULL,
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `platform_username` (`platform`, `username`)
+);
+
+DROP TABLE IF EXISTS `mews_app`.`Posts`;
+CREATE TABLE `mews_app`.`Posts` (
+  `id` bigint(20) NOT NULL AUTO_INCREMENT,
+  `user_id` bigint(20) NOT NULL,
+  `post_url` varchar(255) DEFAULT NULL,
+  `image_url` varchar(255) DEFAULT NULL,
+  `reposts` int(11) DEFAULT NULL,
+  `replies` int(11) DEFAULT NULL,
+  `likes` int(11) DEFAULT NULL,
+  `when_posted` datetime DEFAULT NULL,
+  `when_scraped` datetime DEFAULT NULL,
+  `when_updated` datetime DEFAULT NULL,
+  `related_text` text,
+  `ocr_text` text,
+  `image_directory` varchar(255) DEFAULT NULL,
+  `image_filename` varchar(255) DEFAULT NULL,
+  `manip_image_directory` varchar(255) DEFAULT NULL,
+  `manip_image_filename` varchar(255) DEFAULT NULL,
+  `scrape_id` bigint(20) DEFAULT NULL,
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `scrape_id` (`scrape_id`),
+  KEY `when_posted` (`when_posted`)
+);
+
+DROP TABLE IF EXISTS `mews_app`.`Hashtags`;
+CREATE TABLE `mews_app`.`Hashtags` (
+  `id` bigint(20) NOT NULL AUTO_INCREMENT,
+  `value` varchar(255) NOT NULL,
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `value` (`value`)
+);
+
+DROP TABLE IF EXISTS `mews_app`.`HashtagsInPosts`;
+CREATE TABLE `mews_app`.`HashtagsInPosts` (
+  `hashtag_id` bigint(20) NOT NULL,
+  `post_id` bigint(20) NOT NULL,
+  PRIMARY KEY (`hashtag_id`, `post_id`)
+);
+
+DROP TABLE IF EXISTS `mews_app`.`PostRelatedness`;
+CREATE TABLE `mews_app`.`PostRelatedness` (
+  `post1_id` bigint(20) NOT NULL,
+  `post2_id` bigint(20) NOT NULL,
+  `rel_txt_wt` double DEFAULT NULL,
+  `rel_txt_meta` varchar(255) DEFAULT NULL,
+  `sub_img_wt` double DEFAULT NULL,
+  `sub_img_meta` varchar(255) DEFAULT NULL,
+  `ocr_wt` double DEFAULT NULL,
+  `ocr_meta` varchar(255) DEFAULT NULL,
+  `scaled_sub_img_wt` double DEFAULT NULL,
+  `total_wt` double DEFAULT NULL,
+  `added` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`post1_id`,`post2_id`),
+  KEY `added` (`added`)
+);
+
+DROP TABLE IF EXISTS `mews_app`.`PostCentrality`;
+CREATE TABLE `mews_app`.`PostCentrality` (
+  `post_id` bigint(20) NOT NULL,
+  `score` double NOT NULL,
+  `evaluated` datetime NOT NULL,
+  PRIMARY KEY (`post_id`)
+);
+
+DROP TABLE IF EXISTS `mews_app`.`Clusterings`;
+CREATE TABLE `mews_app`.`Clusterings` (
+  `id` bigint(20) NOT NULL AUTO_INCREMENT,
+  `when_created` datetime NOT NULL,
+  PRIMARY KEY (`id`)
+);
+
+DROP TABLE IF EXISTS `mews_app`.`DailyClusterings`;
+CREATE TABLE `mews_app`.`DailyClusterings` (
+  `day` date NOT NULL,
+  `clustering_id` bigint(20) NOT NULL,
+  PRIMARY KEY (`day`)
+);
+
+DROP TABLE IF EXISTS `mews_app`.`Clusters`;
+CREATE TABLE `mews_app`.`Clusters` (
+  `id` bigint(20) NOT NULL AUTO_INCREMENT,
+  `clustering_id` bigint(20) NOT NULL,
+  `size` int(11) NOT NULL DEFAULT 0,
+  `size_rank` int(11) DEFAULT NULL,
+  `representative_id` bigint(20) DEFAULT NULL,
+  PRIMARY KEY (`id`),
+  KEY `clustering_rank` (`clustering_id`, `size_rank`)
+);
+
+DROP TABLE IF EXISTS `mews_app`.`PostsInClusters`;
+CREATE TABLE `mews_app`.`PostsInClusters` (
+  `post_id` bigint(20) NOT NULL,
+  `cluster_id` bigint(20) NOT NULL,
+  `centrality` double DEFAULT NULL,
+  PRIMARY KEY (`post_id`, `cluster_id`),
+  KEY `cluster_post` (`cluster_id`, `post_id`)
+);
+
+DROP TABLE IF EXISTS `mews_app`.`ClusteringPayloads`;
+CREATE TABLE `mews_app`.`ClusteringPayloads` (
+  `clustering_id` bigint(20) NOT NULL,
+  `payload` mediumblob NOT NULL,
+  PRIMARY KEY (`clustering_id`)
+);
+
+DROP TABLE IF EXISTS `mews_app`.`PostBoxes`;
+CREATE TABLE `mews_app`.`PostBoxes` (
+  `post_id` bigint(20) NOT NULL,
+  `boxes` mediumtext NOT NULL,
+  `linked_boxes` mediumtext NOT NULL,
+  PRIMARY KEY (`post_id`)
+);
+
+DROP TABLE IF EXISTS `mews_app`.`PostAdjacency`;
+CREATE TABLE `mews_app`.`PostAdjacency` (
+  `post_id` bigint(20) NOT NULL,
+  `other_id` bigint(20) NOT NULL,
+  `outgoing` tinyint(1) NOT NULL,
+  `total_wt` double DEFAULT NULL,
+  PRIMARY KEY (`post_id`, `other_id`),
+  KEY `post_weight` (`post_id`, `total_wt` DESC)
+);
+
+DROP TABLE IF EXISTS `mews_app`.`PostTopNeighbors`;
+CREATE TABLE `mews_app`.`PostTopNeighbors` (
+  `post_id` bigint(20) NOT NULL,
+  `neighbors` text NOT NULL,
+  PRIMARY KEY (`post_id`)
+);
+
+DROP TABLE IF EXISTS `mews_app`.`DataVersion`;
+CREATE TABLE `mews_app`.`DataVersion` (
+  `id` tinyint(4) NOT NULL,
+  `version` bigint(20) NOT NULL,
+  `updated` datetime NOT NULL,
+  PRIMARY KEY (`id`)
+);
+
+DROP TABLE IF EXISTS `mews_app`.`TrendingSnapshots`;
+CREATE TABLE `mews_app`.`TrendingSnapshots` (
+  `window_days` int(11) NOT NULL,
+  `position` int(11) NOT NULL,
+  `post_id` bigint(20) NOT NULL,
+  `score` double NOT NULL,
+  `when_posted` datetime NOT NULL,
+  PRIMARY KEY (`window_days`, `position`)
+);
+
+DROP TABLE IF EXISTS `mews_app`.`TrendingSnapshotRuns`;
+CREATE TABLE `mews_app`.`TrendingSnapshotRuns` (
+  `window_days` int(11) NOT NULL,
+  `lower_dt` datetime NOT NULL,
+  `upper_dt` datetime NOT NULL,
+  `computed` datetime NOT NULL,
+  `size` int(11) NOT NULL,
+  PRIMARY KEY (`window_days`)
+);
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+
+'''
+' @file   seed.py
+' @desc   Fills a local mews_app database with synthetic posts, users, edges, centrality ...
+'         ... and daily clusterings for bench/endpoints.py.
+' @notes  DROPS AND RECREATES the mews_app tables in bench/schema.sql. Only point it at a
+'         throwaway local MySQL/MariaDB server.
+'         Posts are split into communities of consecutive ids that are densely linked, ...
+'         ... so clusterPosts.py finds realistic clusters in the seeded graph.
+'''
+
+### Imports
+
+from datetime import datetime, timedelta
+from tqdm import tqdm
+import networkx as nx
+import mysql.connector
+import random
+import json
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import clusterPosts
+from MewsUtils import Boxes, TopNeighbors
+
+
+### Constants
+
+SCHEMA_FILEPATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'schema.sql')
+
+# Servers Seeding Is Allowed on Without --yes-drop
+LOCAL_HOSTS = {'127.0.0.1', 'localhost', '::1'}
+
+SCALES = {
+    '10k': 10_000,
+    '1m': 1_000_000,
+    '10m': 10_000_000
+}
+
+BATCH_SIZE = 5000
+POSTS_PER_USER = 20
+COMMUNITY_SIZE = 20
+COMMUNITY_DEGREE = 4
+CENTRAL_FRACTION = 0.1
+WORDS = ['vote', 'ballot', 'fraud', 'rally', 'border', 'vaccine', 'mask', 'protest', 'police', 'court',
+         'senate', 'election', 'media', 'fake', 'news', 'meme', 'flag', 'tax', 'strike', 'riot']
+
+
+### Functions
+
+def usage(code):
+    print(f'''Usage: {os.path.basename(sys.argv[0])} [-h] [--scale SCALE] [--posts N] [--days N] [--clusters N] --config PATH [--yes-drop]
+    -h               Help message
+    --scale SCALE    Number of posts: {', '.join(SCALES)} (default 10k)
+    --posts N        Exact number of posts (overrides --scale)
+    --days N         Days of history the posts are spread over, ending now (default 60)
+    --clusters N     Clusters per daily clustering (default 100)
+    --config PATH    mysql.connector config of a throwaway server (required)
+    --yes-drop       Seed even if the server is not local or mews_app already has posts''')
+    sys.exit(code)
+
+
+def loadConfig(filepath):
+    '''
+    @desc   Loads the mysql config json files
+    --
+    @param  filepath  path to config file
+    '''
+    with open(filepath) as f:
+        return json.load(f)
+
+
+def createSchema(cursor):
+    with open(SCHEMA_FILEPATH) as f:
+        statements = [s.strip() for s in f.read().split(';')]
+    for statement in statements:
+        lines = [line for line in statement.splitlines() if not line.startswith('--')]
+        if any(line.strip() for line in lines):
+            cursor.execute('\n'.join(lines))
+
+
+def insertBatches(cnx, cursor, sql, rows, total, desc):
+    '''
+    @desc   Inserts rows in batches, committing each
+    --
+    @param  sql    INSERT statement with %s placeholders
+    @param  rows   iterable of tuples
+    @param  total  expected number of rows, for the progress bar
+    '''
+    batch = []
+    for row in tqdm(rows, total=total, desc=desc, leave=False):
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            cursor.executemany(sql, batch)
+            cnx.commit()
+            batch = []
+    if batch:
+        cursor.executemany(sql, batch)
+        cnx.commit()
+
+
+def postTime(post_id, num_posts, begin_dt, days):
+    # Ids Increase With when_posted
+    return begin_dt + timedelta(days=days * (post_id - 1) / num_posts)
+
+
+def communityEdges(community, num_posts):
+    '''
+    @desc    Deterministic intra-community edges, so clusters can be rebuilt without reading them back
+    --
+    @return  generator of (post1_id, post2_id, weight)
+    '''
+    rng = random.Random(community)
+    first = community * COMMUNITY_SIZE + 1
+    members = range(first, min(first + COMMUNITY_SIZE, num_posts + 1))
+    for post_id in members:
+        for other_id in rng.sample(members, min(COMMUNITY_DEGREE, len(members))):
+            if post_id < other_id:
+                yield post_id, other_id, 0.5 + rng.random()
+
+
+def genUsers(num_users):
+    for user_id in range(1, num_users + 1):
+        yield user_id, random.choice(['twitter', 'instagram', 'facebook']), f'user{user_id}'
+
+
+def genPosts(num_posts, num_users, begin_dt, days):
+    for post_id in range(1, num_posts + 1):
+        when_posted = postTime(post_id, num_posts, begin_dt, days)
+        yield (
+            post_id,
+            random.randint(1, num_users),
+            f'https://example.com/p/{post_id}',
+            f'https://example.com/i/{post_id}.jpg',
+            int(random.paretovariate(1.2)) - 1,
+            int(random.paretovariate(1.4)) - 1,
+            int(random.paretovariate(1.1)) - 1,
+            when_posted,
+            when_posted + timedelta(hours=1),
+            when_posted + timedelta(hours=2),
+            ' '.join(random.sample(WORDS, 5)),
+            ' '.join(random.sample(WORDS, 3)),
+            'images/',
+            f'{post_id}.jpg',
+            'manip/',
+            f'{post_id}.jpg',
+            post_id
+        )
+
+
+def genEdges(num_posts, posts_per_day):
+    for community in range((num_posts + COMMUNITY_SIZE - 1) // COMMUNITY_SIZE):
+        edges = list(communityEdges(community, num_posts))
+
+        # One Looser Link per Member to a Post From the Following Days
+        first = community * COMMUNITY_SIZE + 1
+        for post_id in range(first, min(first + COMMUNITY_SIZE, num_posts + 1)):
+            other_id = post_id + random.randint(COMMUNITY_SIZE, max(COMMUNITY_SIZE, 3 * posts_per_day))
+            if other_id <= num_posts:
+                edges.append((post_id, other_id, random.random() / 2))
+
+        for post1_id, post2_id, weight in edges:
+            has_box = random.random() < 0.3
+            yield (
+                post1_id,
+                post2_id,
+                weight,
+                '|'.join(random.sample(WORDS, 2)),
+                weight if has_box else None,
+                f'[{random.randint(0, 200)}, {random.randint(0, 200)}, 64, 64]' if has_box else None,
+                weight / 2,
+                '|'.join(random.sample(WORDS, 1)),
+                weight if has_box else None,
+                weight
+            )
+
+
+def genCentrality(num_posts, begin_dt, days):
+    for post_id in random.sample(range(1, num_posts + 1), int(num_posts * CENTRAL_FRACTION)):
+        yield post_id, random.random(), postTime(post_id, num_posts, begin_dt, days)
+
+
+def seedClusterings(cnx, cursor, num_posts, begin_dt, days, clusters_per_day):
+    '''
+    @desc   Writes one daily clustering per day through clusterPosts.py, payloads included
+    '''
+    posts_per_day = num_posts / days
+    for day in tqdm(range(days), desc='DailyClusterings', leave=False):
+        day_dt = (begin_dt + timedelta(days=day)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+        # Communities Posted on That Day
+        first_community = int(day * posts_per_day) // COMMUNITY_SIZE
+        last_community = int((day + 1) * posts_per_day) // COMMUNITY_SIZE
+        communities = range(first_community, max(first_community + 1, last_community))
+        communities = random.sample(communities, min(clusters_per_day, len(communities)))
+
+        graph = nx.Graph()
+        clusters = []
+        for community in communities:
+            edges = list(communityEdges(community, num_posts))
+            graph.add_edges_from((post1_id, post2_id, {'weight': weight}) for post1_id, post2_id, weight in edges)
+            cluster = {post_id for edge in edges for post_id in edge[:2]}
+            if cluster:
+                clusters.append(cluster)
+
+        clustering_id = clusterPosts.clustering_to_db(cursor)
+        clusterPosts.write_clusters(cursor, clustering_id, graph, clusters)
+        clusterPosts.daily_to_db(cursor, clustering_id, day_dt)
+        cnx.commit()
+
+
+def checkTarget(cursor, config):
+    '''
+    @desc    Reasons not to drop the mews_app tables on this server
+    @return  list of messages, empty if it looks like a throwaway server
+    '''
+    reasons = []
+    host = config.get('host', 'localhost')
+    if 'unix_socket' not in config and host not in LOCAL_HOSTS:
+        reasons.append(f'host {host} is not local')
+
+    cursor.execute("SELECT COUNT(*) as count FROM information_schema.TABLES WHERE TABLE_SCHEMA = 'mews_app' AND TABLE_NAME = 'Posts';")
+    if cursor.fetchone()['count']:
+        cursor.execute('SELECT EXISTS (SELECT 1 FROM mews_app.Posts) as found;')
+        if cursor.fetchone()['found']:
+            reasons.append('mews_app.Posts already has posts')
+    return reasons
+
+
+def seed(config, num_posts, days, clusters_per_day, yes_drop=False):
+    # Connect Without Default Database, Schema Creates It
+    config = dict(config)
+    config.pop('database', None)
+    config['raise_on_warnings'] = False
+    cnx = mysql.connector.connect(**config)
+    cursor = cnx.cursor(dictionary=True)
+
+    # Refuse to Wipe Anything but a Throwaway Server
+    reasons = checkTarget(cursor, config)
+    if reasons and not yes_drop:
+        print(f'refusing to drop mews_app: {"; ".join(reasons)} (pass --yes-drop if this server is throwaway)', file=sys.stderr)
+        sys.exit(1)
+
+    createSchema(cursor)
+    cnx.commit()
+
+    begin_dt = datetime.now() - timedelta(days=days)
+    num_users = max(1, num_posts // POSTS_PER_USER)
+    posts_per_day = max(1, num_posts // days)
+
+    insertBatches(cnx, cursor, '''
+        INSERT INTO mews_app.Users (id, platform, username) VALUES (%s, %s, %s)
+    ''', genUsers(num_users), num_users, 'Users')
+
+    insertBatches(cnx, cursor, '''
+        INSERT INTO mews_app.Posts (
+            id, user_id, post_url, image_url, reposts, replies, likes,
+            when_posted, when_scraped, when_updated, related_text, ocr_text,
+            image_directory, image_filename, manip_image_directory, manip_image_filename, scrape_id
+        )
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ''', genPosts(num_posts, num_users, begin_dt, days), num_posts, 'Posts')
+
+    insertBatches(cnx, cursor, '''
+        INSERT IGNORE INTO mews_app.PostRelatedness (
+            post1_id, post2_id, rel_txt_wt, rel_txt_meta, sub_img_wt, sub_img_meta,
+            ocr_wt, ocr_meta, scaled_sub_img_wt, total_wt
+        )
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ''', genEdges(num_posts, posts_per_day), None, 'PostRelatedness')
+
+    cursor.execute('''
+        INSERT INTO mews_app.PostAdjacency (post_id, other_id, outgoing, total_wt)
+        SELECT post1_id, post2_id, 1, total_wt FROM mews_app.PostRelatedness
+        UNION ALL
+        SELECT post2_id, post1_id, 0, total_wt FROM mews_app.PostRelatedness
+    ''')
+    Boxes.refreshBoxes(cursor, Boxes.boxedPostIds(cursor))
+    TopNeighbors.refreshTopNeighbors(cursor, TopNeighbors.neighborPostIds(cursor))
+    cnx.commit()
+
+    insertBatches(cnx, cursor, '''
+        INSERT INTO mews_app.PostCentrality (post_id, score, evaluated) VALUES (%s, %s, %s)
+    ''', genCentrality(num_posts, begin_dt, days), int(num_posts * CENTRAL_FRACTION), 'PostCentrality')
+
+    seedClusterings(cnx, cursor, num_posts, begin_dt, days, clusters_per_day)
+
+    cursor.close()
+    cnx.close()
+
+
+### Main Execution
+
+if __name__ == '__main__':
+    num_posts = SCALES['10k']
+    days = 60
+    clusters_per_day = 100
+    config_path = None
+    yes_drop = False
+
+    args = sys.argv[1:]
+    while len(args):
+        arg = args.pop(0)
+        if arg == '-h':
+            usage(0)
+        elif arg == '--scale':
+            scale = args.pop(0).lower()
+            if scale not in SCALES:
+                usage(1)
+            num_posts = SCALES[scale]
+        elif arg == '--posts':
+            num_posts = int(args.pop(0))
+        elif arg == '--days':
+            days = int(args.pop(0))
+        elif arg == '--clusters':
+            clusters_per_day = int(args.pop(0))
+        elif arg == '--config':
+            config_path = args.pop(0)
+        elif arg == '--yes-drop':
+            yes_drop = True
+        else:
+            usage(1)
+
+    # No Default: the App's Own Config Points at Production
+    if config_path is None:
+        usage(1)
+
+    random.seed(0)
+    seed(loadConfig(config_path), num_posts, days, clusters_per_day, yes_drop)
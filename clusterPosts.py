@@ -6,14 +6,26 @@ import mysql.connector
 from datetime import datetime, timedelta
 from networkx.algorithms import community
 from networkx.algorithms import centrality
+from collections import defaultdict
 from tqdm import tqdm
+from MewsUtils import DataVersion, EdgeStore, SlowQueries
+from MewsUtils.RunReport import RunReport
 import networkx as nx
+import pickle
+import random
 import json
+import zlib
+import time
 import sys
+import os
 
 ### Constants
 
 MEWS_CONFIG_FILEPATH = 'config/inter-mews.json'
+STATE_FILEPATH = '/data/mews/clustering/state.pickle'
+
+# Deltas Miss Deleted Edges, so Persisted Windows Are Reloaded in Full This Often
+FULL_RELOAD_EVERY = timedelta(days=7)
 
 ### Functions
 
@@ -32,7 +44,7 @@ def connectSQL(config):
     --
     @param  config  mysql.connector config object
     '''
-    return mysql.connector.connect(**config)
+    return SlowQueries.connect(**config)
 
 def graph_from_db(cursor, begin_dt, end_dt):
     # Query to Gather Nodes & Edges
@@ -77,10 +89,191 @@ def graph_from_db(cursor, begin_dt, end_dt):
     # Build Graph
     graph = nx.Graph()
     graph.add_nodes_from(nodes)
-    graph.add_edges_from((edge['node1_id'], edge['node2_id'], {'weight': edge['weight']}) for edge in edges)
+    graph.add_edges_from((edge['node1_id'], edge['node2_id'], {'weight': edge['weight'], 'post1': edge['node1_id']}) for edge in edges)
+
+    return graph
 
+def graph_from_store(store_dir, begin_dt, end_dt):
+    '''
+    @desc   Builds the window graph from the on-disk edge store instead of the DB
+    --
+    @param  store_dir  directory of the edge store
+    @param  begin_dt   first day of the window
+    @param  end_dt     day after the last day of the window
+    '''
+    graph = nx.Graph()
+    graph.add_edges_from((src, dst, {'weight': weight, 'post1': src}) for src, dst, weight in EdgeStore.loadWindow(store_dir, begin_dt.date(), end_dt.date()))
     return graph
 
+def window_delta_from_db(cursor, prev_begin_dt, prev_end_dt, begin_dt, end_dt, prev_loaded_dt):
+    '''
+    @desc    Grabs what changed when sliding the window forward
+    --
+    @param   cursor       cursor for mysql.connector
+    @param   prev_begin_dt  beginning of the previous window
+    @param   prev_end_dt    end of the previous window
+    @param   begin_dt     beginning of the new window
+    @param   end_dt       end of the new window
+    @param   prev_loaded_dt DB time the previous window was loaded at
+    @return  edges        edges with at least one post that entered the window, or inserted since ...
+                          ... the previous load (e.g. late-synced posts)
+    @return  expired      ids of posts that left the window
+    '''
+
+    # Query to Gather Added Edges
+    sql = '''
+        SELECT
+            node1.id as node1_id,
+            node2.id as node2_id,
+            edge.total_wt as weight
+        FROM
+            mews_app.PostRelatedness as edge,
+            mews_app.Posts as node1,
+            mews_app.Posts as node2
+        WHERE
+            edge.post1_id = node1.id
+            AND
+            edge.post2_id = node2.id
+            AND
+            node1.when_posted BETWEEN %(begin_dt)s AND %(end_dt)s
+            AND
+            node2.when_posted BETWEEN %(begin_dt)s AND %(end_dt)s
+            AND
+            (
+                node1.when_posted > %(prev_end_dt)s
+                OR
+                node2.when_posted > %(prev_end_dt)s
+                OR
+                edge.added >= %(prev_loaded_dt)s
+            )
+            AND 
+            edge.total_wt > 0
+        ;
+    '''
+
+    # Arguments
+    args = {
+        'begin_dt': begin_dt,
+        'end_dt': end_dt,
+        'prev_end_dt': prev_end_dt,
+        'prev_loaded_dt': prev_loaded_dt
+    }
+
+    # Run Query
+    cursor.execute(sql, args)
+    edges = cursor.fetchall()
+
+    # Query to Gather Expired Posts
+    sql = '''
+        SELECT
+            id
+        FROM
+            mews_app.Posts
+        WHERE
+            when_posted >= %(prev_begin_dt)s
+            AND
+            when_posted < %(begin_dt)s
+        ;
+    '''
+
+    # Arguments
+    args = {
+        'prev_begin_dt': prev_begin_dt,
+        'begin_dt': begin_dt
+    }
+
+    # Run Query
+    cursor.execute(sql, args)
+    expired = [row['id'] for row in cursor.fetchall()]
+
+    return edges, expired
+
+def window_delta_from_store(store_dir, prev_begin_dt, prev_end_dt, begin_dt, end_dt, prev_loaded_ts):
+    '''
+    @desc    Grabs what changed when sliding the window forward from the edge store
+    --
+    @param   store_dir      directory of the edge store
+    @param   prev_begin_dt  beginning of the previous window
+    @param   prev_end_dt    end of the previous window
+    @param   begin_dt       beginning of the new window
+    @param   end_dt         end of the new window
+    @param   prev_loaded_ts time.time() the previous window was loaded at
+    @return  edges          edges with at least one post that entered the window, or in an older ...
+                            ... partition rewritten since the previous load (syncGraph.py -e)
+    @return  expired_edges  (src, dst) of edges with a post that left the window
+    '''
+    begin_day, end_day = begin_dt.date(), end_dt.date()
+    prev_begin_day, prev_end_day = prev_begin_dt.date(), prev_end_dt.date()
+
+    # New Partitions and Rewritten Old Ones, Minus Edges to Posts Already Expired
+    loaded_days = [(prev_end_day, end_day)]
+    loaded_days += [(day, day + timedelta(1)) for day in EdgeStore.changedDays(store_dir, begin_day, prev_end_day, prev_loaded_ts)]
+    edges = [
+        {'node1_id': src, 'node2_id': dst, 'weight': weight}
+        for first_day, last_day in loaded_days
+        for src, dst, weight in EdgeStore.loadEdges(store_dir, first_day, last_day, begin_day)
+    ]
+
+    # Old Partitions, Edges Whose Older Post Left the Window
+    expired_edges = [
+        (src, dst)
+        for src, dst, weight in EdgeStore.loadEdges(store_dir, prev_begin_day, prev_end_day, prev_begin_day, begin_day)
+    ]
+
+    return edges, expired_edges
+
+def apply_window_delta(graph, edges, expired, expired_edges=()):
+    '''
+    @desc   Updates graph in place with the output of window_delta_from_db or window_delta_from_store
+    --
+    @param  graph          networkx graph of the previous window
+    @param  edges          edges to add
+    @param  expired        ids of posts to drop
+    @param  expired_edges  (src, dst) of edges to drop
+    '''
+    graph.remove_nodes_from(expired)
+    graph.remove_edges_from(expired_edges)
+    graph.add_edges_from((edge['node1_id'], edge['node2_id'], {'weight': edge['weight'], 'post1': edge['node1_id']}) for edge in edges)
+
+    # Full Loads Only Know Nodes Through Their Edges
+    graph.remove_nodes_from(list(nx.isolates(graph)))
+
+def load_state(filepath):
+    '''
+    @desc    Loads the graph and labels persisted by the previous incremental run
+    --
+    @param   filepath  path to state file
+    @return  state dict, or None if there is no usable state
+    '''
+    try:
+        with open(filepath, 'rb') as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+
+def save_state(filepath, state):
+    '''
+    @desc   Persists state for the next incremental run
+    --
+    @param  filepath  path to state file
+    @param  state     dict with window, graph, labels and centralities
+    '''
+    os.makedirs(os.path.dirname(filepath) or '.', exist_ok=True)
+    tmp_filepath = filepath + '.tmp'
+    with open(tmp_filepath, 'wb') as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_filepath, filepath)
+
+def can_slide(state, begin_dt, end_dt):
+    '''
+    @desc   Checks if the persisted window can be slid forward onto [begin_dt, end_dt]
+    '''
+    if state is None or 'loaded_ts' not in state:
+        return False
+    if datetime.now() - state['full_dt'] >= FULL_RELOAD_EVERY:
+        return False
+    return state['begin_dt'] <= begin_dt <= state['end_dt'] <= end_dt
+
 def daily_to_db(cursor, clustering_id, day):
     # Query
     sql = '''
@@ -153,24 +346,37 @@ def clustering_to_db(cursor):
 
     return id
 
-def cluster_to_db(cursor, clustering_id, cluster, centralities):
+def representative(cluster, centralities):
+    # Most Central Post Stands for the Cluster
+    return max(cluster, key=lambda post_id: centralities[post_id])
+
+def cluster_to_db(cursor, clustering_id, cluster, centralities, rank):
     # Query to Insert Cluster
     sql = '''
         INSERT INTO
             mews_app.Clusters
         (
-            clustering_id
+            clustering_id,
+            size,
+            size_rank,
+            representative_id
         )
         VALUES
         (
-            %(clustering_id)s
+            %(clustering_id)s,
+            %(size)s,
+            %(size_rank)s,
+            %(representative_id)s
         )
         ;
     '''
 
     # Arguments
     args = {
-        'clustering_id': clustering_id
+        'clustering_id': clustering_id,
+        'size': len(cluster),
+        'size_rank': rank,
+        'representative_id': representative(cluster, centralities)
     }
 
     # Run Query
@@ -206,62 +412,393 @@ def cluster_to_db(cursor, clustering_id, cluster, centralities):
 
     return cluster_id
 
+def post_urls_from_db(cursor, post_ids):
+    '''
+    @desc    Grabs post_url of each post
+    --
+    @param   cursor    cursor for mysql.connector
+    @param   post_ids  iterable of post ids
+    @return  dict of post id -> post_url
+    '''
+    post_ids = list(post_ids)
+    urls = {}
+    chunk_size = 1000
+    for i in range(0, len(post_ids), chunk_size):
+        chunk = post_ids[i:i + chunk_size]
+        sql = f'''
+            SELECT
+                id,
+                post_url
+            FROM
+                mews_app.Posts
+            WHERE
+                id IN ({','.join(['%s'] * len(chunk))})
+            ;
+        '''
+        cursor.execute(sql, chunk)
+        urls.update((row['id'], row['post_url']) for row in cursor.fetchall())
+    return urls
+
+def links(graph, cluster):
+    '''
+    @desc    Edges of a cluster as PostRelatedness stores them, so payloads match the SQL fallback of the API
+    --
+    @param   graph    networkx graph the cluster was generated from
+    @param   cluster  set of post ids
+    @return  list of [post1_id, post2_id, weight] sorted by post1_id, post2_id
+    '''
+    edges = []
+    for source, target, data in graph.subgraph(cluster).edges(data=True):
+        # Undirected Graph Forgets Orientation, Edge Keeps It
+        if data.get('post1', source) != source:
+            source, target = target, source
+        edges.append([source, target, data['weight']])
+    return sorted(edges)
+
+def payload_to_db(cursor, clustering_id, graph, written):
+    '''
+    @desc   Stores the /clusters response of a clustering, so the API serves it with one keyed read
+    --
+    @param  cursor         cursor for mysql.connector
+    @param  clustering_id  id of clustering the clusters belong to
+    @param  graph          networkx graph the clusters were generated from
+    @param  written        list of (cluster id, cluster, centralities) in rank order
+    '''
+    urls = post_urls_from_db(cursor, (post_id for _, cluster, _ in written for post_id in cluster))
+
+    clusters = []
+    for cluster_id, cluster, centralities in written:
+        clusters.append({
+            'id': cluster_id,
+            'nodes': [{'id': post_id, 'post_url': urls.get(post_id), 'centrality': centralities[post_id]} for post_id in cluster],
+            'links': links(graph, cluster),
+            'representative': representative(cluster, centralities)
+        })
+
+    # Compact JSON, Compressed
+    payload = zlib.compress(json.dumps({'clusters': clusters}, separators=(',', ':')).encode())
+
+    # Query
+    sql = '''
+        REPLACE INTO
+            mews_app.ClusteringPayloads
+        (
+            clustering_id,
+            payload
+        )
+        VALUES
+        (
+            %(clustering_id)s,
+            %(payload)s
+        )
+        ;
+    '''
+
+    # Arguments
+    args = {
+        'clustering_id': clustering_id,
+        'payload': payload
+    }
+
+    # Run Query
+    cursor.execute(sql, args)
+
 def generate_clusters(graph):
-    # Wrapper for Clustering Algorithm
-    return community.asyn_lpa_communities(graph)
+    # Wrapper for Clustering Algorithm, Weighted Like generate_clusters_warm
+    return community.asyn_lpa_communities(graph, weight='weight')
+
+def generate_clusters_warm(graph, labels):
+    '''
+    @desc    Asynchronous label propagation seeded with a previous run's labels
+    --
+    @param   graph     networkx graph
+    @param   labels    dict of node -> label from the previous run
+    @return  clusters  list of sets of nodes
+    @return  labels    dict of node -> label to seed the next run
+    '''
+
+    # Surviving Nodes Keep Their Label, New Nodes Get Their Own
+    next_label = max(labels.values(), default=-1) + 1
+    current = {}
+    for node in graph:
+        if node in labels:
+            current[node] = labels[node]
+        else:
+            current[node] = next_label
+            next_label += 1
+
+    # Same Update Rule as community.asyn_lpa_communities(graph, weight='weight')
+    nodes = list(graph)
+    changed = True
+    while changed:
+        changed = False
+        random.shuffle(nodes)
+        for node in nodes:
+            if len(graph[node]) < 1:
+                continue
+            counts = defaultdict(float)
+            for neighbor, data in graph[node].items():
+                counts[current[neighbor]] += data.get('weight', 1)
+            best = max(counts.values())
+            best_labels = [label for label, count in counts.items() if count == best]
+            if current[node] not in best_labels:
+                current[node] = random.choice(best_labels)
+                changed = True
+
+    # Group Nodes by Label
+    groups = defaultdict(set)
+    for node, label in current.items():
+        groups[label].add(node)
+
+    # Inherited Labels Can Span Parts No Longer Connected (e.g. a Bridging Post Expired); ...
+    # ... the Largest Part Keeps the Label, the Others Get New Ones
+    clusters = []
+    for label, group in groups.items():
+        parts = sorted(nx.connected_components(graph.subgraph(group)), key=len, reverse=True)
+        for part in parts[1:]:
+            for node in part:
+                current[node] = next_label
+            next_label += 1
+        clusters.extend(parts)
+
+    return clusters, current
+
+def labels_from_clusters(clusters):
+    # Labels to Seed generate_clusters_warm
+    return {node: label for label, cluster in enumerate(clusters) for node in cluster}
 
 def cluster_centralities(graph, cluster):
     # Wrapper for Centrality Algorithm
     return centrality.betweenness_centrality(graph.subgraph(cluster), weight='weight')
 
+def cluster_key(graph, cluster):
+    # Members and Weighted Edges of the Cluster's Subgraph, Either Edge Direction
+    edges = frozenset((min(u, v), max(u, v), weight) for u, v, weight in graph.subgraph(cluster).edges(data='weight'))
+    return frozenset(cluster), edges
+
+def write_clusters(cursor, clustering_id, graph, clusters, cached=None):
+    '''
+    @desc    Inserts the useful clusters of a clustering with their centralities and its payload
+    --
+    @param   cursor         cursor for mysql.connector
+    @param   clustering_id  id of clustering the clusters belong to
+    @param   graph          networkx graph the clusters were generated from
+    @param   clusters       iterable of sets of nodes
+    @param   cached         dict of cluster_key() -> centralities to reuse
+    @return  dict of cluster_key() -> centralities for every written cluster
+    '''
+    cached = cached or {}
+    written = {}
+    rows = []
+    reused = 0
+
+    # Useful Clusters, Largest First so Insertion Order is Rank
+    clusters = sorted((cluster for cluster in clusters if len(cluster) > 4), key=len, reverse=True)
+
+    for rank, cluster in enumerate(tqdm(clusters)):
+        # Same Members, Edges and Weights Means Same Centralities
+        members = cluster_key(graph, cluster)
+        centralities = cached.get(members)
+        if centralities is None:
+            centralities = cluster_centralities(graph, cluster)
+        else:
+            reused += 1
+        written[members] = centralities
+
+        cluster_id = cluster_to_db(cursor, clustering_id, cluster, centralities, rank)
+        rows.append((cluster_id, cluster, centralities))
+
+    payload_to_db(cursor, clustering_id, graph, rows)
+
+    if cached:
+        print(f'reused centralities for {reused} of {len(written)} clusters', file=sys.stderr)
+
+    return written
+
+def cluster_window(cnx, cursor, begin_dt, end_dt, daily_dt=None, state=None, store_dir=None, warm=False):
+    '''
+    @desc    Loads the window graph (sliding state forward if possible), clusters it and writes the clustering
+    --
+    @param   cnx        mysql.connector connection, committed once the clustering is written
+    @param   cursor     cursor for mysql.connector
+    @param   begin_dt   beginning of the window
+    @param   end_dt     end of the window
+    @param   daily_dt   day to record in DailyClusterings, if any
+    @param   state      state of a previous window to slide forward, or None for a full load
+    @param   store_dir  directory of the edge store to load from instead of the DB
+    @param   warm       warm-start label propagation and reuse centralities from state
+    @return  state      state of this window
+    @return  timings    dict of phase -> seconds
+    '''
+    timings = {}
+
+    # Load Graph, Noting When (in DB Time) for the Next Delta
+    start = time.perf_counter()
+    cursor.execute('SELECT NOW() as now;')
+    loaded_dt = cursor.fetchone()['now']
+    loaded_ts = time.time()
+    slide = can_slide(state, begin_dt, end_dt)
+    if slide:
+        # Slide Previous Window Forward
+        if store_dir is not None:
+            edges, expired_edges = window_delta_from_store(store_dir, state['begin_dt'], state['end_dt'], begin_dt, end_dt, state['loaded_ts'])
+            expired = []
+        else:
+            edges, expired = window_delta_from_db(cursor, state['begin_dt'], state['end_dt'], begin_dt, end_dt, state['loaded_dt'])
+            expired_edges = []
+        print(f'window delta has {len(edges)} added edges, {len(expired)} expired nodes, {len(expired_edges)} expired edges', file=sys.stderr)
+        graph = state['graph']
+        apply_window_delta(graph, edges, expired, expired_edges)
+    elif store_dir is not None:
+        graph = graph_from_store(store_dir, begin_dt, end_dt)
+    else:
+        graph = graph_from_db(cursor, begin_dt, end_dt)
+    print(f'graph has {len(graph.nodes)} nodes, {len(graph.edges)} edges', file=sys.stderr)
+    timings['load'] = time.perf_counter() - start
+
+    # Generate Clusters
+    start = time.perf_counter()
+    if slide and warm:
+        clusters, labels = generate_clusters_warm(graph, state['labels'])
+        cached = state['centralities']
+    else:
+        clusters = list(generate_clusters(graph))
+        labels = labels_from_clusters(clusters)
+        cached = None
+    timings['cluster'] = time.perf_counter() - start
+  
+    # Clusters to DB
+    start = time.perf_counter()
+    clustering_id = clustering_to_db(cursor)
+    centralities = write_clusters(cursor, clustering_id, graph, clusters, cached)
+    if daily_dt is not None:
+        daily_to_db(cursor, clustering_id, daily_dt)
+    timings['write'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    DataVersion.bump(cursor)
+    cnx.commit()
+    timings['commit'] = time.perf_counter() - start
+
+    state = {
+        'begin_dt': begin_dt,
+        'end_dt': end_dt,
+        'graph': graph,
+        'labels': labels,
+        'centralities': centralities,
+        'loaded_dt': loaded_dt,
+        'loaded_ts': loaded_ts,
+        'full_dt': state['full_dt'] if slide else loaded_dt
+    }
+
+    return state, timings
+
+def pop_value(args, arg):
+    # Option Values Never Start With --, e.g. --daily --incremental DATE
+    if not len(args) or args[0].startswith('--'):
+        print(f'{arg} requires a value', file=sys.stderr)
+        exit(-1)
+    return args.pop(0)
+
 def main():
     begin_dt = None
     end_dt = None 
     daily_dt = None   
+    backfill = None
+    incremental = False
+    state_path = STATE_FILEPATH
+    store_dir = None
 
     args = sys.argv[1:]
     date_format = '%Y-%m-%d'
     while len(args):
         arg = args.pop(0)
         if arg in ['--begin']:
-            arg = args.pop(0)
+            arg = pop_value(args, arg)
             begin_dt = datetime.strptime(arg, date_format)
         elif arg in ['--end']:
-            arg = args.pop(0)
+            arg = pop_value(args, arg)
             end_dt = datetime.strptime(arg, date_format)
         elif arg in ['--daily']:
-            arg = args.pop(0)
+            arg = pop_value(args, arg)
             daily_dt = datetime.strptime(arg, date_format)
             if begin_dt is None:
                 begin_dt = daily_dt - timedelta(6)
             if end_dt is None:
                 end_dt = daily_dt + timedelta(1)
+        elif arg in ['--backfill']:
+            first_dt = datetime.strptime(pop_value(args, arg), date_format)
+            last_dt = datetime.strptime(pop_value(args, arg), date_format)
+            backfill = (first_dt, last_dt)
+        elif arg in ['--incremental']:
+            incremental = True
+        elif arg in ['--state']:
+            state_path = pop_value(args, arg)
+        elif arg in ['--store']:
+            store_dir = pop_value(args, arg)
+
+    if backfill is not None:
+        if daily_dt is not None or begin_dt is not None or end_dt is not None:
+            print('--backfill cannot be combined with --begin, --end or --daily', file=sys.stderr)
+            exit(-1)
+        if backfill[0] > backfill[1]:
+            print('--backfill START must not be after END', file=sys.stderr)
+            exit(-1)
+    elif begin_dt is None or end_dt is None:
+        print('please provide date range (--begin and --end, --daily, or --backfill)', file=sys.stderr)
+        exit(-1)
 
-    if begin_dt is None or end_dt is None:
-        print('please provide date range (--begin and --end, or --daily)', file=sys.stderr)
+    if incremental and daily_dt is None and backfill is None:
+        print('--incremental requires --daily or --backfill', file=sys.stderr)
         exit(-1)
 
+    report = RunReport('clusterPosts')
+    try:
+        run(report, begin_dt, end_dt, daily_dt, backfill, incremental, state_path, store_dir)
+    except BaseException:
+        report.save('failed')
+        raise
+    print(f'run report: {report.save()}', file=sys.stderr)
+
+def run(report, begin_dt, end_dt, daily_dt, backfill, incremental, state_path, store_dir):
+    date_format = '%Y-%m-%d'
+
     # Grab Mews Config
     config = loadConfig(MEWS_CONFIG_FILEPATH)
     cnx = connectSQL(config)
     cursor = cnx.cursor(dictionary=True)
 
-    # Load Graph
-    graph = graph_from_db(cursor, begin_dt, end_dt)
-    print(f'graph has {len(graph.nodes)} nodes, {len(graph.edges)} edges', file=sys.stderr)
-  
-    # Clusters to DB
-    clustering_id = clustering_to_db(cursor)
-    for cluster in tqdm(generate_clusters(graph)):
-        if len(cluster) <= 4: 
-            # Not Useful
-            continue
-        centralities = cluster_centralities(graph, cluster)
-
-        cluster_to_db(cursor, clustering_id, cluster, centralities)
-    if daily_dt is not None:
-        daily_to_db(cursor, clustering_id, daily_dt)
-    cnx.commit()
+    # Windows to Cluster
+    if backfill is not None:
+        windows = []
+        day_dt = backfill[0]
+        while day_dt <= backfill[1]:
+            windows.append((day_dt - timedelta(6), day_dt + timedelta(1), day_dt))
+            day_dt += timedelta(1)
+    else:
+        windows = [(begin_dt, end_dt, daily_dt)]
+
+    state = load_state(state_path) if incremental else None
+    if incremental and not can_slide(state, *windows[0][:2]):
+        print('no usable state, loading full window', file=sys.stderr)
+
+    # Each Window Slides the Previous One Forward
+    for begin_dt, end_dt, daily_dt in windows:
+        state, timings = cluster_window(cnx, cursor, begin_dt, end_dt, daily_dt, state, store_dir, warm=incremental)
+        if backfill is not None:
+            print(f'{daily_dt.strftime(date_format)}: ' + ', '.join(f'{phase} {seconds:.1f}s' for phase, seconds in timings.items()), file=sys.stderr)
+        for phase, seconds in timings.items():
+            report.add(phase, seconds)
+        report.count('windows')
+        report.count('rows_in', state['graph'].number_of_edges())
+        report.count('rows_out', sum(len(members) for members, _ in state['centralities']))
+    if backfill is not None:
+        print(f'{len(windows)} days: ' + ', '.join(f'{phase} {seconds:.1f}s' for phase, seconds in report.phases.items()), file=sys.stderr)
+
+    # Persist State for Next Incremental Run
+    if incremental:
+        with report.phase('save_state'):
+            save_state(state_path, state)
 
     # Clean Up
     cursor.close()
@@ -270,4 +807,4 @@ def main():
 # Main Execution
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
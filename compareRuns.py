@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+
+'''
+' @file   compareRuns.py
+' @desc   Lists run reports of the pipeline stages over time and flags slow runs.
+' @notes  A run is flagged when its wall time exceeds the median of the runs before it ...
+'         ... (of the same stage) by more than the tolerance.
+'''
+
+### Imports
+
+from MewsUtils.RunReport import REPORT_FOLDER
+from statistics import median
+import json
+import glob
+import sys
+import os
+
+
+### Functions
+
+def usage(code):
+    print(f'''Usage: {os.path.basename(sys.argv[0])} [-h -d DIR -s STAGE -n N -w N -t PCT]
+    -h          Help message
+    -d  DIR     Report folder (default {REPORT_FOLDER})
+    -s  STAGE   Only this stage (syncPosts, syncGraph, clusterPosts)
+    -n  N       Runs to show per stage (default 14)
+    -w  N       Previous runs the median is taken over (default 7)
+    -t  PCT     Tolerance over the median before flagging, in percent (default 25)''')
+    sys.exit(code)
+
+
+def loadReports(folder, stage=None):
+    '''
+    @desc    Reads reports, grouped by stage, oldest first
+    '''
+    reports = {}
+    for path in glob.glob(os.path.join(folder, '*.json')):
+        try:
+            with open(path) as f:
+                report = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if stage is not None and report.get('stage') != stage:
+            continue
+        reports.setdefault(report['stage'], []).append(report)
+    for runs in reports.values():
+        runs.sort(key=lambda r: r['started'])
+    return reports
+
+
+def compare(runs, amount, window, tolerance):
+    '''
+    @desc    Prints one line per run with its change against the median of the previous window runs
+    '''
+    phases = sorted({phase for run in runs for phase in run['phases_s']})
+    print(f'{"started":19} {"status":6} {"wall s":>9} {"vs med":>7} ' + ' '.join(f'{p[:8]:>8}' for p in phases) + f' {"rows in":>9} {"rows out":>9} {"rows/s":>9} {"rss MB":>7}')
+
+    first = max(0, len(runs) - amount)
+    for i in range(first, len(runs)):
+        run = runs[i]
+        previous = [r['wall_s'] for r in runs[max(0, i - window):i] if r['status'] == 'ok']
+        change = ''
+        flag = ''
+        if previous:
+            base = median(previous)
+            if base > 0:
+                ratio = run['wall_s'] / base - 1
+                change = f'{ratio * 100:+.0f}%'
+                if ratio > tolerance and run['status'] == 'ok':
+                    flag = '  <-- slower'
+        counts = run.get('counts', {})
+        print(f'{run["started"][:19]:19} {run["status"]:6} {run["wall_s"]:9.1f} {change:>7} '
+              + ' '.join(f'{run["phases_s"].get(p, 0):8.1f}' for p in phases)
+              + f' {counts.get("rows_in", 0):9} {counts.get("rows_out", 0):9} {run.get("rows_per_s") or 0:9.1f} {run["peak_rss_mb"]:7.1f}{flag}')
+
+
+### Main Execution
+
+if __name__ == '__main__':
+    folder = REPORT_FOLDER
+    stage = None
+    amount = 14
+    window = 7
+    tolerance = 0.25
+
+    args = sys.argv[1:]
+    while len(args):
+        arg = args.pop(0)
+        if arg == '-h':
+            usage(0)
+        elif arg == '-d':
+            folder = args.pop(0)
+        elif arg == '-s':
+            stage = args.pop(0)
+        elif arg == '-n':
+            amount = int(args.pop(0))
+        elif arg == '-w':
+            window = int(args.pop(0))
+        elif arg == '-t':
+            tolerance = float(args.pop(0)) / 100
+        else:
+            usage(1)
+
+    reports = loadReports(folder, stage)
+    if not reports:
+        print(f'No run reports in {folder}', file=sys.stderr)
+        sys.exit(1)
+
+    for name in ['syncPosts', 'syncGraph', 'clusterPosts'] + sorted(set(reports) - {'syncPosts', 'syncGraph', 'clusterPosts'}):
+        if name not in reports:
+            continue
+        print(f'== {name} ==')
+        compare(reports[name], amount, window, tolerance)
+        print()
@@ -16,3 +16,99 @@ CREATE TABLE `PostCentrality` (
   `evaluated` datetime NOT NULL,
   PRIMARY KEY (`post_id`)
 );
+
+CREATE TABLE `ClusteringPayloads` (
+  `clustering_id` bigint(20) NOT NULL,
+  `payload` mediumblob NOT NULL,
+  PRIMARY KEY (`clustering_id`)
+);
+
+-- Sub-Image Boxes per Post, Maintained by syncGraph.py (Fill Once With ./syncGraph.py -b)
+CREATE TABLE `PostBoxes` (
+  `post_id` bigint(20) NOT NULL,
+  `boxes` mediumtext NOT NULL,
+  `linked_boxes` mediumtext NOT NULL,
+  PRIMARY KEY (`post_id`)
+);
+
+-- Every Edge Once From Each Side, Maintained by syncGraph.py; outgoing = 1 if post_id Is post1_id
+CREATE TABLE `PostAdjacency` (
+  `post_id` bigint(20) NOT NULL,
+  `other_id` bigint(20) NOT NULL,
+  `outgoing` tinyint(1) NOT NULL,
+  `total_wt` double DEFAULT NULL,
+  PRIMARY KEY (`post_id`, `other_id`),
+  KEY `post_weight` (`post_id`, `total_wt` DESC)
+);
+
+INSERT INTO `PostAdjacency` (`post_id`, `other_id`, `outgoing`, `total_wt`)
+SELECT `post1_id`, `post2_id`, 1, `total_wt` FROM `PostRelatedness`
+UNION ALL
+SELECT `post2_id`, `post1_id`, 0, `total_wt` FROM `PostRelatedness`
+ON DUPLICATE KEY UPDATE `outgoing` = VALUES(`outgoing`), `total_wt` = VALUES(`total_wt`);
+
+-- Heaviest Neighbors per Post, Maintained by syncGraph.py (Fill Once With ./syncGraph.py -b)
+CREATE TABLE `PostTopNeighbors` (
+  `post_id` bigint(20) NOT NULL,
+  `neighbors` text NOT NULL,
+  PRIMARY KEY (`post_id`)
+);
+
+-- Single Row Bumped by the Sync and Clustering Jobs on Commit, for ETags
+CREATE TABLE `DataVersion` (
+  `id` tinyint(4) NOT NULL,
+  `version` bigint(20) NOT NULL,
+  `updated` datetime NOT NULL,
+  PRIMARY KEY (`id`)
+);
+
+INSERT IGNORE INTO `DataVersion` (`id`, `version`, `updated`) VALUES (1, 1, NOW());
+
+-- Ranked Trending Lists of the Standard Windows, Written by snapshotTrending.py
+CREATE TABLE `TrendingSnapshots` (
+  `window_days` int(11) NOT NULL,
+  `position` int(11) NOT NULL,
+  `post_id` bigint(20) NOT NULL,
+  `score` double NOT NULL,
+  `when_posted` datetime NOT NULL,
+  PRIMARY KEY (`window_days`, `position`)
+);
+
+CREATE TABLE `TrendingSnapshotRuns` (
+  `window_days` int(11) NOT NULL,
+  `lower_dt` datetime NOT NULL,
+  `upper_dt` datetime NOT NULL,
+  `computed` datetime NOT NULL,
+  `size` int(11) NOT NULL,
+  PRIMARY KEY (`window_days`)
+);
+
+-- When Each Edge Was Inserted, for clusterPosts.py --incremental (Existing Edges Get the Time of the ALTER)
+ALTER TABLE `PostRelatedness`
+  ADD COLUMN `added` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  ADD INDEX `added` (`added`);
+
+-- Cluster Size, Rank Within Its Clustering (0 is largest) and Most Central Post
+ALTER TABLE `Clusters`
+  ADD COLUMN `size` int(11) NOT NULL DEFAULT 0,
+  ADD COLUMN `size_rank` int(11) DEFAULT NULL,
+  ADD COLUMN `representative_id` bigint(20) DEFAULT NULL,
+  ADD INDEX `clustering_rank` (`clustering_id`, `size_rank`);
+
+ALTER TABLE `PostsInClusters`
+  ADD INDEX `cluster_post` (`cluster_id`, `post_id`);
+
+-- Backfill Clusters Written Before size/size_rank/representative_id Existed
+UPDATE `Clusters`
+SET
+  `size` = (SELECT COUNT(*) FROM `PostsInClusters` WHERE `PostsInClusters`.`cluster_id` = `Clusters`.`id`),
+  `representative_id` = (SELECT `post_id` FROM `PostsInClusters` WHERE `PostsInClusters`.`cluster_id` = `Clusters`.`id` ORDER BY `centrality` DESC LIMIT 1)
+WHERE `size_rank` IS NULL;
+
+UPDATE `Clusters`
+  JOIN (
+    SELECT `id`, ROW_NUMBER() OVER (PARTITION BY `clustering_id` ORDER BY `size` DESC, `id`) - 1 AS `r`
+    FROM `Clusters`
+  ) AS `ranked` USING (`id`)
+SET `Clusters`.`size_rank` = `ranked`.`r`
+WHERE `Clusters`.`size_rank` IS NULL;
@@ -1,4 +1,5 @@
 #! /bin/bash
 ./mews-venv/bin/python ./syncPosts.py
-./mews-venv/bin/python ./syncGraph.py -n -s
-./mews-venv/bin/python ./clusterPosts.py --daily `date --date="yesterday" +"%Y-%m-%d"`
\ No newline at end of file
+./mews-venv/bin/python ./snapshotTrending.py
+./mews-venv/bin/python ./syncGraph.py -n -s -e /data/mews/edge_store -g /data/mews/graph_index/index.pickle
+./mews-venv/bin/python ./clusterPosts.py --daily `date --date="yesterday" +"%Y-%m-%d"` --incremental
\ No newline at end of file
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+
+'''
+' @file   exportGraph.py
+' @desc   Rebuilds the day partitions of the on-disk edge store from mews_app ...
+'         ... so clusterPosts.py --store can load windows without the DB.
+'''
+
+### Imports
+
+from datetime import datetime, timedelta
+from MewsUtils import EdgeStore, SlowQueries
+import json
+import sys
+
+### Constants
+
+MEWS_CONFIG_FILEPATH = 'config/inter-mews.json'
+
+### Functions
+
+def loadConfig(filepath):
+    '''
+    @desc   Loads the mysql config json files
+    --
+    @param  filepath  path to config file
+    '''
+    with open(filepath) as f:
+        return json.load(f)
+
+def connectSQL(config):
+    '''
+    @desc   Connects to mysql
+    --
+    @param  config  mysql.connector config object
+    '''
+    return SlowQueries.connect(**config)
+
+def main():
+    begin_dt = None
+    end_dt = None
+    store_dir = EdgeStore.STORE_FOLDER
+
+    args = sys.argv[1:]
+    date_format = '%Y-%m-%d'
+    while len(args):
+        arg = args.pop(0)
+        if arg in ['--begin']:
+            arg = args.pop(0)
+            begin_dt = datetime.strptime(arg, date_format)
+        elif arg in ['--end']:
+            arg = args.pop(0)
+            end_dt = datetime.strptime(arg, date_format)
+        elif arg in ['--store']:
+            store_dir = args.pop(0)
+
+    if begin_dt is None or end_dt is None:
+        print('please provide date range (--begin and --end)', file=sys.stderr)
+        exit(-1)
+
+    # Grab Mews Config
+    config = loadConfig(MEWS_CONFIG_FILEPATH)
+    cnx = connectSQL(config)
+    cursor = cnx.cursor(dictionary=True)
+
+    # One Day at a Time Keeps Each Result Set Small
+    day = begin_dt.date()
+    while day < end_dt.date():
+        count = EdgeStore.exportDays(cursor, store_dir, day, day + timedelta(1))
+        print(f'{day}: {count} edges', file=sys.stderr)
+        day += timedelta(1)
+
+    # Clean Up
+    cursor.close()
+    cnx.close()
+
+# Main Execution
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+
+'''
+' @file   reportSlowQueries.py
+' @desc   Summarizes the slow query log written by MewsUtils.SlowQueries, worst offenders first.
+'''
+
+### Imports
+
+from collections import defaultdict
+from MewsUtils import SlowQueries
+import json
+import sys
+import os
+
+
+### Functions
+
+def usage(code):
+    print(f'''Usage: {os.path.basename(sys.argv[0])} [-h -n N -b ORDER -s SINCE] [LOG_PATH ...]
+    -h              Help message
+    -n  N           Number of statements to show (default 10)
+    -b  ORDER       Rank by total, max or count (default total)
+    -s  SINCE       Only entries logged at or after SINCE (ISO date, e.g. 2021-04-01)
+    LOG_PATH        Log files to read (default {SlowQueries.LOG_FILEPATH} and its rotated backups)''')
+    sys.exit(code)
+
+
+def logPaths(path):
+    # Rotated Backups First so Entries Are Read Oldest to Newest
+    backups = [f'{path}.{i}' for i in range(SlowQueries.LOG_BACKUPS, 0, -1)]
+    return [p for p in backups + [path] if os.path.exists(p)]
+
+
+def readEntries(paths, since=None):
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if since is not None and entry['when'] < since:
+                    continue
+                yield entry
+
+
+def summarize(entries):
+    '''
+    @desc    Groups entries by fingerprint
+    @return  dict of fingerprint -> stats, keeping the slowest entry as sample
+    '''
+    groups = defaultdict(lambda: {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'callers': set(), 'sample': None})
+    for entry in entries:
+        group = groups[entry['fingerprint']]
+        group['count'] += 1
+        group['total_ms'] += entry['duration_ms']
+        if entry.get('caller'):
+            group['callers'].add(entry['caller'])
+        if entry['duration_ms'] >= group['max_ms']:
+            group['max_ms'] = entry['duration_ms']
+            group['sample'] = entry
+    return groups
+
+
+def formatPlan(plan):
+    if plan is None:
+        return ['    (no plan)']
+    if isinstance(plan, str):
+        return [f'    (EXPLAIN failed: {plan})']
+    lines = []
+    for row in plan:
+        lines.append('    {table:<20} type={type:<8} key={key:<20} rows={rows:<10} {extra}'.format(
+            table=str(row.get('table')),
+            type=str(row.get('type')),
+            key=str(row.get('key')),
+            rows=str(row.get('rows')),
+            extra=row.get('Extra') or ''
+        ))
+    return lines
+
+
+def report(groups, amount, order):
+    keys = {
+        'total': lambda g: g['total_ms'],
+        'max': lambda g: g['max_ms'],
+        'count': lambda g: g['count']
+    }
+    ranked = sorted(groups.items(), key=lambda t: keys[order](t[1]), reverse=True)[:amount]
+
+    for rank, (fingerprint, group) in enumerate(ranked, 1):
+        sample = group['sample']
+        print(f'#{rank} {fingerprint}: {group["count"]} calls, total {group["total_ms"]:.0f} ms, '
+              f'mean {group["total_ms"] / group["count"]:.0f} ms, max {group["max_ms"]:.0f} ms')
+        print(f'  from:   {", ".join(sorted(group["callers"])) or "unknown"}')
+        print(f'  params: {json.dumps(sample["params"])}')
+        print(f'  sql:    {sample["sql"][:300]}')
+        print('  plan of slowest call:')
+        for line in formatPlan(sample['explain']):
+            print(line)
+        print()
+
+
+### Main Execution
+
+if __name__ == '__main__':
+    amount = 10
+    order = 'total'
+    since = None
+
+    args = sys.argv[1:]
+    while len(args) and args[0].startswith('-') and len(args[0]) > 1:
+        arg = args.pop(0)
+        if arg == '-h':
+            usage(0)
+        elif arg == '-n':
+            amount = int(args.pop(0))
+        elif arg == '-b':
+            order = args.pop(0)
+            if order not in ['total', 'max', 'count']:
+                usage(1)
+        elif arg == '-s':
+            since = args.pop(0)
+        else:
+            usage(1)
+
+    paths = [p for path in args for p in logPaths(path)] if args else logPaths(SlowQueries.LOG_FILEPATH)
+    if not paths:
+        print('No slow query log found', file=sys.stderr)
+        sys.exit(1)
+
+    report(summarize(readEntries(paths, since)), amount, order)
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+
+'''
+' @file   snapshotTrending.py
+' @desc   Ranks the standard trending windows (MewsUtils/Trending.py) and stores the lists ...
+'         ... so /posts/trending pages through them instead of re-ranking. Run after syncPosts.py/updatePosts.py.
+'''
+
+### Imports
+
+from MewsUtils import DataVersion, SlowQueries, Trending
+from MewsUtils.RunReport import RunReport
+import json
+import sys
+
+### Constants
+
+MEWS_CONFIG_FILEPATH = 'config/inter-mews.json'
+
+### Functions
+
+def loadConfig(filepath):
+    '''
+    @desc   Loads the mysql config json files
+    --
+    @param  filepath  path to config file
+    '''
+    with open(filepath) as f:
+        return json.load(f)
+
+def connectSQL(config):
+    '''
+    @desc   Connects to mysql
+    --
+    @param  config  mysql.connector config object
+    '''
+    return SlowQueries.connect(**config)
+
+def main():
+    report = RunReport('snapshotTrending')
+
+    # Grab Mews Config
+    config = loadConfig(MEWS_CONFIG_FILEPATH)
+    cnx = connectSQL(config)
+    cursor = cnx.cursor(dictionary=True)
+
+    try:
+        # Rank and Store Every Window in One Transaction
+        with report.phase('write'):
+            counts = Trending.snapshot(cursor)
+            DataVersion.bump(cursor)
+        with report.phase('commit'):
+            cnx.commit()
+    except BaseException:
+        report.save('failed')
+        raise
+
+    for days, count in counts.items():
+        print(f'{days} day window: {count} posts', file=sys.stderr)
+        report.count('rows_out', count)
+    report.save()
+
+    # Clean Up
+    cursor.close()
+    cnx.close()
+
+# Main Execution
+
+if __name__ == '__main__':
+    main()
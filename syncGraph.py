@@ -3,7 +3,7 @@
 '''
 ' @file   syncGraph.py
 ' @desc   Grabs input JSON file of posts and edges, inserts into PostRelatedness ...
-'         ... the edges and inserts into PostCentrality the scores from posts.
+'         ... (and both sides into PostAdjacency) the edges and inserts into PostCentrality the scores from posts.
 ' @notes  The file has scrape_id's. For inserting into our DB, we need to search for our id's (seen below in queries).
 '''
 
@@ -11,6 +11,8 @@
 
 from datetime import datetime, timedelta
 from collections import defaultdict
+from MewsUtils import Boxes, DataVersion, EdgeStore, GraphIndex, SlowQueries, TopNeighbors
+from MewsUtils.RunReport import RunReport
 import mysql.connector
 import json
 import sys
@@ -38,7 +40,10 @@ def usage(code):
     -s              Silence standard output
     -n              No log file
     -i  GRAPH_PATH  Input file path (default is file in {GRAPH_FOLDER}/)
-    -o  LOG_PATH    Specify log file path (default generates file in {LOG_FOLDER}/)''')
+    -o  LOG_PATH    Specify log file path (default generates file in {LOG_FOLDER}/)
+    -e  STORE_PATH  Refresh the edge store partitions touched by the new edges
+    -g  INDEX_PATH  Write a graph index snapshot for app.py after syncing
+    -b              Rebuild the per-post summaries (PostBoxes, PostTopNeighbors) of every post instead of syncing''')
     sys.exit(code)
 
 def logprint(s):
@@ -209,6 +214,53 @@ def insertPostRelatedness(cursor, source, target, rw, rm, sw, sm, ow, om):
         raise
 
 
+def insertPostAdjacency(cursor, source, target):
+    '''
+    @desc   Mirrors an inserted edge into PostAdjacency, once from each side
+    --
+    @param  cursor  cursor for mysql.connector
+    @param  source  scrape_id of post 1
+    @param  target  scrape_id of post 2
+    '''
+
+    # Query Structure
+    sql = '''
+    INSERT INTO mews_app.PostAdjacency (post_id, other_id, outgoing, total_wt)
+    SELECT post_id, other_id, outgoing, total_wt
+    FROM (
+        SELECT post1_id AS post_id, post2_id AS other_id, 1 AS outgoing, total_wt
+        FROM mews_app.PostRelatedness
+        WHERE
+            post1_id = (SELECT id FROM mews_app.Posts WHERE scrape_id = %(source)s)
+            AND
+            post2_id = (SELECT id FROM mews_app.Posts WHERE scrape_id = %(target)s)
+        UNION ALL
+        SELECT post2_id, post1_id, 0, total_wt
+        FROM mews_app.PostRelatedness
+        WHERE
+            post1_id = (SELECT id FROM mews_app.Posts WHERE scrape_id = %(source)s)
+            AND
+            post2_id = (SELECT id FROM mews_app.Posts WHERE scrape_id = %(target)s)
+    ) AS sides
+    ON DUPLICATE KEY UPDATE
+        outgoing = VALUES(outgoing),
+        total_wt = VALUES(total_wt)
+    ;
+    '''
+
+    # Query Arguments
+    args = {
+        'source': source,
+        'target': target
+    }
+
+    # Run Query
+    try:
+        cursor.execute(sql, args)
+    except mysql.connector.Error:
+        raise
+
+
 def insertPostCentrality(cursor, pid, score):
     '''
     @desc   Insert information into Post Centrality
@@ -251,18 +303,89 @@ def insertPostCentrality(cursor, pid, score):
         raise
 
 
-def syncGraph(fpath):
+def getPostDays(cursor, scrape_ids):
+    '''
+    @desc    Returns the distinct days the given posts were posted on
+    --
+    @param   cursor      cursor for mysql.connector
+    @param   scrape_ids  iterable of scrape_id
+    @return  set of dates
+    '''
+    scrape_ids = list(scrape_ids)
+    days = set()
+    chunk_size = 1000
+    for i in range(0, len(scrape_ids), chunk_size):
+        chunk = scrape_ids[i:i + chunk_size]
+        sql = f'''
+        SELECT DISTINCT
+            DATE(when_posted) as day
+        FROM
+            mews_app.Posts
+        WHERE
+            scrape_id IN ({','.join(['%s'] * len(chunk))})
+        ;
+        '''
+        cursor.execute(sql, chunk)
+        days.update(row['day'] for row in cursor.fetchall() if row['day'] is not None)
+    return days
+
+
+def exportEdgeStore(cursor, store_path, scrape_ids):
+    '''
+    @desc   Rewrites the edge store partitions of the days the given posts were posted on
+    --
+    @param  cursor      cursor for mysql.connector
+    @param  store_path  directory of the edge store
+    @param  scrape_ids  scrape_id of every post with a new edge
+    '''
+
+    # An Edge Lives in the Partition of Its Newer Post, One of These Days
+    for day in sorted(getPostDays(cursor, scrape_ids)):
+        count = EdgeStore.exportDays(cursor, store_path, day, day + timedelta(1))
+        logprint(f'Exported {count} edges to partition {day} of "{store_path}"')
+
+
+def rebuildSummaries():
+    '''
+    @desc  Recomputes PostBoxes and PostTopNeighbors for every post, e.g. after creating the tables
+    '''
+    appConfig = loadConfig(MEWS_CONFIG_FILEPATH)
+    try:
+        appCnx = SlowQueries.connect(**appConfig)
+    except mysql.connector.Error as err:
+        logprint(str(err))
+        sys.exit(1)
+    appCursor = appCnx.cursor(dictionary=True)
+
+    count = Boxes.refreshBoxes(appCursor, Boxes.boxedPostIds(appCursor))
+    appCnx.commit()
+    logprint(f'Rebuilt box summaries of {count} posts')
+
+    count = TopNeighbors.refreshTopNeighbors(appCursor, TopNeighbors.neighborPostIds(appCursor))
+    appCnx.commit()
+    logprint(f'Rebuilt top neighbors of {count} posts')
+
+    # Responses Built From the Old Summaries Must Not Validate
+    DataVersion.bump(appCursor)
+    appCnx.commit()
+
+    appCnx.close()
+
+
+def syncGraph(fpath, store_path=None, report=None, index_path=None):
     '''
     @desc  grabs JSON, inserts into PostRelatedness and PostCentrality
     '''
+    report = report or RunReport('syncGraph')
 
     # Load in Text File
-    posts, edges = load_json(fpath)
+    with report.phase('load'):
+        posts, edges = load_json(fpath)
 
     # Connect to Mews-App
     appConfig = loadConfig(MEWS_CONFIG_FILEPATH)
     try:
-        appCnx = mysql.connector.connect(**appConfig)
+        appCnx = SlowQueries.connect(**appConfig)
     except mysql.connector.Error as err:
         logprint(str(err))
         sys.exit(0)
@@ -270,37 +393,78 @@ def syncGraph(fpath):
     appCursor = appCnx.cursor(dictionary=True)
 
     # Insert Edges into DB
+    touched = set()
     for source in edges:
         for target in edges[source]:
 
+            report.count('rows_in')
+
             # Grab Weights and Metadata
-            rw, rm = getRelTxtWeightsMeta(posts, edges, source, target)
-            ow, om = getOcrWeightsMeta(posts, edges, source, target)
-            sw, sm = getSubimageWeightsMeta(edges, source, target)
+            with report.phase('transform'):
+                rw, rm = getRelTxtWeightsMeta(posts, edges, source, target)
+                ow, om = getOcrWeightsMeta(posts, edges, source, target)
+                sw, sm = getSubimageWeightsMeta(edges, source, target)
 
             # Insert into Post Relatedness
             try:
-                insertPostRelatedness(appCursor, source, target, rw, rm, sw, sm, ow, om)
+                with report.phase('write'):
+                    insertPostRelatedness(appCursor, source, target, rw, rm, sw, sm, ow, om)
+                    insertPostAdjacency(appCursor, source, target)
             except Exception as ex:
                 logprint(str(ex))
                 continue
 
-            appCnx.commit()
+            with report.phase('commit'):
+                appCnx.commit()
+            report.count('rows_out')
+            touched.update((source, target))
 
     # Insert Post Centrality into DB
     for post in posts:
 
+            report.count('rows_in')
+
             # Grab Centrality Scores
             post_score = posts[post]['score']
 
             # Insert Source into Post Centrality
             try:
-                insertPostCentrality(appCursor, post, post_score)
+                with report.phase('write'):
+                    insertPostCentrality(appCursor, post, post_score)
             except Exception as ex:
                 logprint(str(ex))
                 continue
 
-            appCnx.commit()
+            with report.phase('commit'):
+                appCnx.commit()
+            report.count('rows_out')
+
+    # Refresh Box Summaries and Top Neighbors of Posts With New Edges
+    touched_ids = Boxes.postIds(appCursor, touched)
+    with report.phase('boxes'):
+        count = Boxes.refreshBoxes(appCursor, touched_ids)
+        appCnx.commit()
+    logprint(f'Refreshed box summaries of {count} posts')
+    with report.phase('top_neighbors'):
+        count = TopNeighbors.refreshTopNeighbors(appCursor, touched_ids)
+        appCnx.commit()
+    logprint(f'Refreshed top neighbors of {count} posts')
+
+    # Refresh Edge Store
+    if store_path is not None:
+        with report.phase('export'):
+            exportEdgeStore(appCursor, store_path, touched)
+
+    # Snapshot Graph Index, app.py Swaps It In
+    if index_path is not None:
+        with report.phase('index'):
+            GraphIndex.save(GraphIndex.build(appCursor), index_path)
+        logprint(f'Wrote graph index to "{index_path}"')
+
+    # New Data Version for ETags, Once Everything Served Is Written
+    with report.phase('commit'):
+        DataVersion.bump(appCursor)
+        appCnx.commit()
 
     # Disconnect from Mews-App
     appCnx.close()
@@ -313,6 +477,9 @@ if __name__ == '__main__':
     # Variables
     log_path = None
     graph_path = None
+    store_path = None
+    index_path = None
+    rebuild_summaries = False
 
     # Parse Command Line
     args = sys.argv[1:]
@@ -324,6 +491,12 @@ if __name__ == '__main__':
             log_path = args.pop(0)
         elif arg == '-i':
             graph_path = args.pop(0)
+        elif arg == '-e':
+            store_path = args.pop(0)
+        elif arg == '-g':
+            index_path = args.pop(0)
+        elif arg == '-b':
+            rebuild_summaries = True
         elif arg == '-s':
             SILENCE_STDOUT = True
         elif arg == '-n':
@@ -347,13 +520,24 @@ if __name__ == '__main__':
     if PRESERVE_LOG is True:
         logprint(f'Initialized Log File: {log_path}')
 
+    # Only Rebuild Per-Post Summaries
+    if rebuild_summaries:
+        rebuildSummaries()
+        sys.exit(0)
+
     # Grab Today's Graph File
     if graph_path is None:
         graph_path = GRAPH_FOLDER + '/edges_data_' + str(today) + '.json'
     logprint(f'Input Graph File: {graph_path}')
 
     # Sync Graph to
-    syncGraph(graph_path)
+    report = RunReport('syncGraph')
+    try:
+        syncGraph(graph_path, store_path, report, index_path)
+    except BaseException:
+        report.save('failed')
+        raise
+    logprint(f'Run Report: {report.save()}')
 
     # Exit
     sys.exit(0)
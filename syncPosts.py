@@ -8,12 +8,15 @@ import json
 import os
 import re
 from tqdm import tqdm
+from MewsUtils import DataVersion, SlowQueries, Thumbnails
+from MewsUtils.RunReport import RunReport
 
 ### Constants
 
 MEWS_CONFIG_FILEPATH = 'config/inter-mews.json'
 APP_CONFIG_FILEPATH = 'config/mews-app.json'
 SYNC_CONFIG_FILEPATH = 'config/sync.json'
+IMAGE_FOLDER = '/data/mews/'
 
 ### Functions
 
@@ -23,7 +26,7 @@ def loadConfig(filepath):
 
 def connectSQL(config):
     try:
-        return mysql.connector.connect(**config)
+        return SlowQueries.connect(**config)
     except mysql.connector.Error:
         raise
         return None
@@ -302,7 +305,7 @@ def insertUser(cursor, platform, username):
 
     return getInsertedId(cursor)
 
-def pullPosts(cursor):
+def pullPosts(cursor, report):
     # Query Structure
     sql = '''
     SELECT
@@ -329,34 +332,41 @@ def pullPosts(cursor):
     '''
 
     # Run Query
-    cursor.execute(sql)
+    with report.phase('load'):
+        cursor.execute(sql)
 
-    # Fetch Post Data
-    post = cursor.fetchone()
+        # Fetch Post Data
+        post = cursor.fetchone()
     while post is not None:
+        report.count('rows_in')
+
         # Transform Post Data
-        results = {
-            'post_url': post['url'], 
-            'image_url': post['image_url'], 
-            'reposts': post['reposts'],
-            'replies': post['replies'],
-            'likes': post['likes'], 
-            'when_posted': post['when_posted'],
-            'when_scraped': post['when_scraped'],
-            'when_updated': post['when_scraped2'],
-            'related_text': post['related_text'],
-            'ocr_text': post['ocr_text'],
-            'image_directory': post['original_img_dir'],
-            'image_filename': post['original_img_filename'],
-            'scrape_id': post['pic_id'],
-            'hashtags': set(re.split(r',| |, |\|', post['hashtags'])),
-            'platform': post['platform'],
-            'username': post['platform_username']
-        } 
+        with report.phase('transform'):
+            results = {
+                'post_url': post['url'], 
+                'image_url': post['image_url'], 
+                'reposts': post['reposts'],
+                'replies': post['replies'],
+                'likes': post['likes'], 
+                'when_posted': post['when_posted'],
+                'when_scraped': post['when_scraped'],
+                'when_updated': post['when_scraped2'],
+                'related_text': post['related_text'],
+                'ocr_text': post['ocr_text'],
+                'image_directory': post['original_img_dir'],
+                'image_filename': post['original_img_filename'],
+                'scrape_id': post['pic_id'],
+                'hashtags': set(re.split(r',| |, |\|', post['hashtags'])),
+                'platform': post['platform'],
+                'username': post['platform_username']
+            } 
         yield results
-        post = cursor.fetchone()
+        with report.phase('load'):
+            post = cursor.fetchone()
 
 def syncImages():
+    report = RunReport('syncPosts')
+
     # Connect to Mews DB
     mewsConfig = loadConfig(MEWS_CONFIG_FILEPATH)
     mewsCnx = connectSQL(mewsConfig)
@@ -369,17 +379,35 @@ def syncImages():
     appCursor = appCnx.cursor(dictionary=True)
     mewsCursor = mewsCnx.cursor(dictionary=True)
     try:
-        posts = pullPosts(mewsCursor)
+        posts = pullPosts(mewsCursor, report)
         for post in tqdm(posts, leave=False):
-            insertPost(appCursor, post)
+            with report.phase('write'):
+                insertPost(appCursor, post)
+            with report.phase('commit'):
+                appCnx.commit()
+            report.count('rows_out')
+
+            # Downscaled Copies for the Graph View (MEWS_IMAGE_PREGENERATE)
+            if Thumbnails.PREGENERATE_SIZES and post['image_directory'] and post['image_filename']:
+                with report.phase('thumbnails'):
+                    try:
+                        Thumbnails.pregenerate(IMAGE_FOLDER + post['image_directory'] + post['image_filename'])
+                    except OSError as ex:
+                        tqdm.write(f'Skipped thumbnails of {post["scrape_id"]}: {ex}')
+
+        # New Data Version for ETags
+        with report.phase('commit'):
+            DataVersion.bump(appCursor)
             appCnx.commit()
     except:
         mewsCnx.close()
         appCnx.close()
+        report.save('failed')
         raise
 
     mewsCnx.close()
     appCnx.close()
+    report.save()
 
 ### Main Execution
 
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+
+'''
+' @file   test_clusterPosts.py
+' @desc   Full (cold) and incremental (warm) label propagation must optimise the same weighted objective.
+' @notes  Run from the repo root with `python3 -m pytest tests`.
+'''
+
+### Imports
+
+import networkx as nx
+import random
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import clusterPosts
+
+
+### Functions
+
+def weightedGraph():
+    '''
+    @desc   Two heavy 5-cliques and a post x tied to A by one heavy edge and to B by two light ones: ...
+            ... weighted propagation puts x in A, unweighted in B
+    '''
+    graph = nx.Graph()
+    a = [f'a{i}' for i in range(5)]
+    b = [f'b{i}' for i in range(5)]
+    for clique in (a, b):
+        graph.add_edges_from(((u, v, {'weight': 3}) for i, u in enumerate(clique) for v in clique[i + 1:]))
+    graph.add_edge('x', 'a0', weight=5)
+    graph.add_edge('x', 'b0', weight=1)
+    graph.add_edge('x', 'b1', weight=1)
+    return graph, set(a) | {'x'}, set(b)
+
+
+def partition(clusters):
+    return sorted(sorted(cluster) for cluster in clusters)
+
+
+def test_cold_and_warm_reach_the_same_partition():
+    graph, a, b = weightedGraph()
+    expected = partition([a, b])
+
+    for seed in range(20):
+        random.seed(seed)
+        cold = partition(clusterPosts.generate_clusters(graph))
+
+        # Warm Start Where x Still Has B's Label, as After a Slide
+        labels = {node: 0 if node in a else 1 for node in graph}
+        labels['x'] = 1
+        warm, _ = clusterPosts.generate_clusters_warm(graph, labels)
+
+        assert cold == expected
+        assert partition(warm) == expected
+
+
+def test_centralities_are_recomputed_when_weights_change():
+    graph, a, _ = weightedGraph()
+    key = clusterPosts.cluster_key(graph, a)
+
+    graph['a1']['a2']['weight'] = 1
+    assert clusterPosts.cluster_key(graph, a) != key
+    assert clusterPosts.cluster_key(graph, a)[0] == key[0]
+
+
+def test_payload_links_keep_post_relatedness_orientation():
+    # Rows as PostRelatedness Stores Them, in the SQL Fallback's Order
+    rows = [(1, 3, 2), (2, 1, 4), (3, 2, 1)]
+    graph = nx.Graph()
+    graph.add_edges_from((post1, post2, {'weight': weight, 'post1': post1}) for post1, post2, weight in reversed(rows))
+
+    assert clusterPosts.links(graph, {1, 2, 3}) == [list(row) for row in sorted(rows)]
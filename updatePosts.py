@@ -3,6 +3,7 @@
 ### Imports
 
 from datetime import datetime
+from MewsUtils import DataVersion, SlowQueries
 import mysql.connector
 import json
 import sys
@@ -31,7 +32,7 @@ def connectSQL(config):
     @param  config  mysql.connector config object
     '''
     try:
-        return mysql.connector.connect(**config)
+        return SlowQueries.connect(**config)
     except mysql.connector.Error:
         raise
         return None
@@ -90,6 +91,8 @@ def updatePosts():
     except mysql.connector.Error as err:
         print(err)
 
+    # New Data Version for ETags
+    DataVersion.bump(mewsCursor)
     mewsCnx.commit()
 
     # Disconnect from Mews and Mews-App